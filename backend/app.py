@@ -1,23 +1,36 @@
-from flask import Flask, request, jsonify
+import time
+import_started = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from .models.container import Container
+from .models.container import Container, to_timestamp
 from .models.yard import Yard
 from .models.yard_config import YardConfig
-from .models.database import get_db, engine, Base
+from .models.yard_store import YardStore
+from .models.database import SessionLocal, engine, Base, upsert
 from .optimizer.optimizer import Optimizer
-from .utils.csv_parser import parse_csv
-from .utils.logger import app_logger
+from .optimizer.inference_scheduler import InferenceScheduler
+from .optimizer.training_worker import TrainingWorker
+from .optimizer.move_planner import plan_moves
+from .simulator.simulator import YardSimulator, collect_experience
+from .utils.csv_parser import parse_csv, chunked, open_text_stream, CountingReader, MultipartFileReader
+from .utils.jobs import ingest_jobs
+from .utils.page_cache import PageCache, etag_for
+from .utils.logger import app_logger, log_path, LOG_TYPES
+from .utils.log_tail import tail, follow
 from .utils.auth import require_auth
 from .utils.config import config
 import os
+import json
+import math
 import threading
-import time
+from bisect import bisect_right
+from datetime import datetime
+from sqlalchemy import delete, update
 from sqlalchemy.exc import SQLAlchemyError
 
 app = Flask(__name__)
 CORS(app)
-# Initialize database
-Base.metadata.create_all(bind=engine)
 
 # Initialize yard and optimizer
 yard_config = YardConfig(
@@ -29,21 +42,104 @@ yard_config = YardConfig(
     crane_energy_consumption=5
 )
 yard = Yard(yard_config)
-optimizer = Optimizer(yard)
+# Layout persistence; the yard is restored from it in create_app
+yard_store = YardStore(config.YARD_STORE_PATH, compact_every=config.YARD_COMPACT_EVERY,
+                       fsync=config.YARD_JOURNAL_FSYNC) if config.YARD_STORE_PATH else None
+# Serving never records transitions, so it only gets a replay memory when it also trains
+train_in_process = not config.TRAINING_PROCESS
+optimizer = Optimizer(yard,
+                      memory_size=config.REPLAY_MEMORY_SIZE if train_in_process else 0,
+                      prioritized_replay=config.PRIORITIZED_REPLAY,
+                      memory_path=config.REPLAY_MEMORY_PATH if train_in_process else None,
+                      strategy=config.PLACEMENT_STRATEGY,
+                      quantize_inference=config.QUANTIZE_INFERENCE,
+                      checkpoint_dir=config.CHECKPOINT_DIR)
+placement_scheduler = InferenceScheduler(optimizer,
+                                         window_ms=config.INFERENCE_BATCH_WINDOW_MS,
+                                         max_batch_size=config.INFERENCE_MAX_BATCH_SIZE)
+
+training_worker = TrainingWorker(yard_config,
+                                 memory_size=config.REPLAY_MEMORY_SIZE,
+                                 memory_path=config.REPLAY_MEMORY_PATH,
+                                 checkpoint_dir=config.CHECKPOINT_DIR,
+                                 prioritized_replay=config.PRIORITIZED_REPLAY,
+                                 model_path=optimizer.model_path,
+                                 batch_size=config.TRAINING_BATCH_SIZE,
+                                 interval=config.TRAINING_INTERVAL,
+                                 threads=config.TRAINING_THREADS,
+                                 simulator_envs=config.SIMULATOR_ENVS,
+                                 simulator_steps=config.SIMULATOR_STEPS,
+                                 train_steps=config.TRAINING_STEPS)
 
 def training_loop():
+    # In-process training, used when TRAINING_PROCESS is off
+    simulator = None
+    if config.SIMULATOR_ENVS and config.SIMULATOR_STEPS:
+        simulator = YardSimulator(yard_config, num_envs=config.SIMULATOR_ENVS)
+        simulator.reset()
     while True:
-        optimizer.train(batch_size=32)
-        time.sleep(60)  # Train every minute
+        if simulator is not None:
+            collect_experience(simulator, optimizer, config.SIMULATOR_STEPS)
+        optimizer.train(batch_size=config.TRAINING_BATCH_SIZE, steps=config.TRAINING_STEPS)
+        time.sleep(config.TRAINING_INTERVAL)
+
+def checkpoint_loop():
+    # Hot-swaps weights published by the training worker
+    while True:
+        time.sleep(config.CHECKPOINT_POLL_INTERVAL)
+        try:
+            optimizer.refresh_policy()
+        except Exception as e:
+            app_logger.error(f"Error loading policy checkpoint: {str(e)}")
+
+def reoptimize(full=False):
+    return optimizer.reoptimize(max_moves=config.REOPTIMIZE_MAX_MOVES,
+                                time_budget=config.REOPTIMIZE_TIME_BUDGET,
+                                full=full)
 
 def optimization_loop():
     while True:
-        optimizer.reoptimize()
+        try:
+            reoptimize()
+        except Exception as e:
+            # A failed pass must not stop the loop for good
+            app_logger.error(f"Error in optimization loop: {str(e)}")
         time.sleep(config.OPTIMIZATION_INTERVAL)
 
-# Start training and optimization loops in separate threads
-threading.Thread(target=training_loop, daemon=True).start()
-threading.Thread(target=optimization_loop, daemon=True).start()
+startup = {"import_seconds": None, "init_seconds": None, "initialized": False, "background_loops": False, "training": None,
+           "yard_restore": None}
+
+def start_background_loops():
+    if startup["background_loops"]:
+        return
+    if train_in_process:
+        threading.Thread(target=training_loop, daemon=True).start()
+        startup["training"] = "thread"
+    else:
+        training_worker.start()
+        threading.Thread(target=checkpoint_loop, daemon=True).start()
+        startup["training"] = "process"
+    threading.Thread(target=optimization_loop, daemon=True).start()
+    startup["background_loops"] = True
+
+def create_app(start_background=None):
+    # Importing this module only defines routes; database setup, model warm-up and the
+    # background loops happen here so tests and tools can import it cheaply
+    if startup["initialized"]:
+        return app
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    if yard_store is not None:
+        startup["yard_restore"] = yard_store.attach(yard)
+    threading.Thread(target=optimizer.warm_up, daemon=True).start()
+    if start_background is None:
+        start_background = config.ENABLE_BACKGROUND_LOOPS
+    if start_background:
+        start_background_loops()
+    startup["init_seconds"] = round(time.perf_counter() - started, 4)
+    startup["initialized"] = True
+    app_logger.info(f"App initialized: import {startup['import_seconds']}s, init {startup['init_seconds']}s, background loops {startup['background_loops']}")
+    return app
 
 @app.errorhandler(Exception)
 def handle_exception(e):
@@ -52,46 +148,325 @@ def handle_exception(e):
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy"}), 200
+    # Liveness is always reported; readiness means the model is loaded and warmed up
+    return jsonify({"status": "healthy", "ready": optimizer.ready, "startup": startup}), 200
+
+def get_session():
+    # One session per request (or streamed response), closed by close_session
+    if 'db' not in g:
+        g.db = SessionLocal()
+    return g.db
+
+@app.teardown_appcontext
+def close_session(exception):
+    db = g.pop('db', None)
+    if db is not None:
+        db.close()
+
+def parse_container_update(data):
+    # New field values for PUT, all validated before any of them is assigned to the live container
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    changes = {}
+    if 'weight' in data:
+        weight = data['weight']
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight) or weight <= 0:
+            raise ValueError("weight must be a positive number")
+        changes['weight'] = float(weight)
+    if 'destination' in data:
+        if not isinstance(data['destination'], str):
+            raise ValueError("destination must be a string")
+        changes['destination'] = data['destination']
+    for name in ('arrival_date', 'departure_date'):
+        if name in data:
+            try:
+                changes[name] = datetime.strptime(data[name], "%Y-%m-%d")
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a YYYY-MM-DD date")
+    return changes
+
+def store_containers(db, containers):
+    # Batch arrivals are upserted with one statement, so a re-sent container overwrites its row
+    upsert(db, Container.__table__, [container.to_row() for container in containers])
+    db.commit()
+
+def container_from_json(data):
+    return Container(
+        id=data['id'],
+        weight=data['weight'],
+        destination=data['destination'],
+        arrival_date=data['arrival_date'],
+        departure_date=data['departure_date'],
+        content_type=data.get('content_type'),
+        is_refrigerated=data.get('is_refrigerated', False),
+        priority=data.get('priority', 0)
+    )
+
+def place_and_store(containers):
+    # Places the whole batch, then inserts the placed containers in one transaction
+    results = optimizer.place_batch(containers)
+    placed = [container for container, result in zip(containers, results) if result['placed']]
+    db = get_session()
+    try:
+        store_containers(db, placed)
+    except SQLAlchemyError:
+        db.rollback()
+        for container in placed:
+            yard.remove_container(container.id)
+        raise
+    return results
+
+def placement_summary(results):
+    return {
+        "placed": sum(1 for result in results if result['placed']),
+        "failed": sum(1 for result in results if not result['placed']),
+        "results": [
+            {
+                "id": result['id'],
+                "placed": result['placed'],
+                "position": dict(zip(('x', 'y', 'z'), result['position'])) if result['position'] else None,
+                "error": result['error']
+            }
+            for result in results
+        ]
+    }
+
+def ingest_csv(job, stream):
+    # Parses, places and commits one chunk at a time so memory stays bounded
+    reader = CountingReader(stream)
+    errors = []
+
+    def record_invalid_rows():
+        job.rows += len(errors)
+        for line, message in errors:
+            job.record_failure({"line": line, "placed": False, "error": f"Invalid row: {message}"})
+        errors.clear()
+
+    try:
+        for chunk in chunked(parse_csv(open_text_stream(reader), errors), config.CSV_CHUNK_SIZE):
+            for result in place_and_store(chunk):
+                if result['placed']:
+                    job.placed += 1
+                else:
+                    job.record_failure(result)
+            job.rows += len(chunk)
+            job.chunks += 1
+            job.bytes_read = reader.bytes_read
+            record_invalid_rows()
+            yield job
+        record_invalid_rows()
+        job.bytes_read = reader.bytes_read
+        job.finish()
+    except Exception as e:
+        job.finish(error=str(e))
+        app_logger.error(f"Error processing CSV in job {job.id}: {str(e)}")
+    yield job
 
 @app.route('/upload_csv', methods=['POST'])
 @require_auth
 def upload_csv():
-    if 'file' not in request.files:
+    # Accepts a multipart 'file' field or a raw text/csv body, both read incrementally from the
+    # request stream; request.files is never touched, since it would buffer the whole upload
+    if request.mimetype == 'text/csv':
+        stream = request.stream
+    elif request.mimetype == 'multipart/form-data' and request.mimetype_params.get('boundary'):
+        stream = MultipartFileReader(request.stream, request.mimetype_params['boundary'])
+        try:
+            filename = stream.open()
+        except ValueError as e:
+            app_logger.error(f"Invalid multipart body: {str(e)}")
+            return jsonify({"error": "Invalid multipart body"}), 400
+        if filename is None:
+            app_logger.error("No file part in the request")
+            return jsonify({"error": "No file part"}), 400
+        if filename == '':
+            app_logger.error("No selected file")
+            return jsonify({"error": "No selected file"}), 400
+        if not filename.endswith('.csv'):
+            app_logger.error("Invalid file format")
+            return jsonify({"error": "Invalid file format"}), 400
+    else:
         app_logger.error("No file part in the request")
         return jsonify({"error": "No file part"}), 400
-    file = request.files['file']
-    if file.filename == '':
-        app_logger.error("No selected file")
-        return jsonify({"error": "No selected file"}), 400
-    if file and file.filename.endswith('.csv'):
-        try:
-            file_path = os.path.join('/tmp', file.filename)
-            file.save(file_path)
-            containers = parse_csv(file_path)
-            db = next(get_db())
-            for container in containers:
-                position = optimizer.optimize_placement(container)
-                yard.add_container(container, position)
-                db.add(container)
-            db.commit()
-            os.remove(file_path)
-            app_logger.info(f"CSV processed successfully: {file.filename}")
-            return jsonify({"message": "CSV processed successfully"}), 200
-        except Exception as e:
-            db.rollback()
-            app_logger.error(f"Error processing CSV: {str(e)}")
-            return jsonify({"error": "Error processing CSV"}), 500
-    app_logger.error("Invalid file format")
-    return jsonify({"error": "Invalid file format"}), 400
+
+    try:
+        job = ingest_jobs.create(request.args.get('job_id'), request.content_length)
+    except ValueError as e:
+        app_logger.error(str(e))
+        return jsonify({"error": str(e)}), 409
+    app_logger.info(f"CSV ingestion started: job {job.id}")
+    if request.args.get('stream', '').lower() in ('true', '1'):
+        # NDJSON progress lines keep long uploads from idling out
+        progress = (json.dumps(update.to_dict()) + "\n" for update in ingest_csv(job, stream))
+        return Response(stream_with_context(progress), mimetype='application/x-ndjson')
+
+    for _ in ingest_csv(job, stream):
+        pass
+    if job.status == 'failed':
+        return jsonify({"error": "Error processing CSV", **job.to_dict(include_failures=True)}), 500
+    app_logger.info(f"CSV processed successfully: job {job.id}, {job.placed} placed, {job.failed} failed")
+    return jsonify({"message": "CSV processed successfully", **job.to_dict(include_failures=True)}), 200
+
+@app.route('/upload_csv/<job_id>', methods=['GET'])
+@require_auth
+def upload_progress(job_id):
+    job = ingest_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict(include_failures=request.args.get('failures', '').lower() in ('true', '1'))), 200
+
+@app.route('/containers/batch', methods=['POST'])
+@require_auth
+def add_containers_batch():
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            items = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        else:
+            data = request.get_json()
+            items = data.get('containers', []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a list of containers"}), 400
+    except ValueError as e:
+        app_logger.error(f"Invalid batch payload: {str(e)}")
+        return jsonify({"error": "Invalid batch payload"}), 400
+
+    try:
+        containers, invalid = [], []
+        for item in items:
+            try:
+                containers.append(container_from_json(item))
+            except (KeyError, TypeError, ValueError) as e:
+                invalid.append({"id": item.get('id') if isinstance(item, dict) else None,
+                                "placed": False, "position": None, "error": f"Invalid container: {str(e)}"})
+        results = place_and_store(containers) + invalid
+        summary = placement_summary(results)
+        app_logger.info(f"Batch processed: {summary['placed']} placed, {summary['failed']} failed")
+        return jsonify(summary), 200
+    except SQLAlchemyError as e:
+        app_logger.error(f"Database error: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        app_logger.error(f"Error processing batch: {str(e)}")
+        return jsonify({"error": "Error processing batch"}), 500
+
+container_pages = PageCache(config.CONTAINER_CACHE_SIZE)
+
+def parse_fields(value):
+    if not value:
+        return None
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    unknown = [field for field in fields if field not in Container.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+TIME_DEPENDENT_FILTERS = ('overdue', 'departing_within_hours')
+
+def parse_flag(value):
+    return value.lower() in ('true', '1', 't')
+
+def filter_container_ids(snapshot, args, now):
+    # Sorted ids matching the query filters, from the snapshot's secondary indexes; None if unfiltered
+    index = snapshot.index
+    matches = []
+    if 'destination' in args:
+        matches.append(index.with_destination(args['destination']))
+    if 'priority' in args or 'min_priority' in args:
+        matches.append(index.with_priority(args.get('priority', type=int), args.get('min_priority', type=int)))
+    if 'refrigerated' in args:
+        refrigerated = index.refrigerated
+        matches.append(refrigerated if parse_flag(args['refrigerated']) else set(snapshot.containers) - refrigerated)
+    if 'overdue' in args:
+        overdue = set(index.overdue(to_timestamp(now)))
+        matches.append(overdue if parse_flag(args['overdue']) else set(snapshot.containers) - overdue)
+    if 'departing_within_hours' in args:
+        hours = float(args['departing_within_hours'])
+        matches.append(set(index.departing_between(to_timestamp(now), to_timestamp(now) + hours * 3600)))
+    if 'departs_after' in args or 'departs_before' in args:
+        # Both bounds are exclusive: neither matches containers departing on the given date itself
+        after, before = (to_timestamp(datetime.strptime(args[name], "%Y-%m-%d")) if name in args else None
+                         for name in ('departs_after', 'departs_before'))
+        matches.append(set(index.departing_between(after, before, include_end=False)))
+    if not matches:
+        return None
+    matches.sort(key=len)
+    return sorted(set(matches[0]).intersection(*matches[1:]))
+
+def serialize_containers(containers, fields, now, chunk_size=500):
+    # JSON array in chunks, so a full listing never holds more than one chunk of output in memory
+    yield '['
+    for start in range(0, len(containers), chunk_size):
+        chunk = json.dumps([container.to_dict(now, fields) for container in containers[start:start + chunk_size]])
+        yield (',' if start else '') + chunk[1:-1]
+    yield ']'
 
 @app.route('/containers', methods=['GET'])
 @require_auth
 def get_containers():
+    # Served from a snapshot, so a running reoptimization is neither blocked nor observed half-way.
+    # Responses are keyed by yard version and query; time-dependent fields add a CONTAINER_CACHE_TTL
+    # time bucket to the key. ETags come from the key, so unchanged polls get a 304 before any
+    # serialization. `limit`/`cursor` return a page envelope, otherwise the full list is returned
+    # (streamed instead of cached when it is larger than CONTAINER_PAGE_MAX).
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        cursor = request.args.get('cursor')
+        if limit is not None and not 0 < limit <= config.CONTAINER_PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {config.CONTAINER_PAGE_MAX}")
+        # Validated up front so a bad filter is a 400 rather than an error while serializing
+        for name in ('priority', 'min_priority'):
+            if name in request.args:
+                int(request.args[name])
+        if 'departing_within_hours' in request.args:
+            float(request.args['departing_within_hours'])
+        for name in ('departs_after', 'departs_before'):
+            if name in request.args:
+                datetime.strptime(request.args[name], "%Y-%m-%d")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     try:
-        containers_data = [container.to_dict() for container in yard.containers.values()]
-        app_logger.info(f"Retrieved {len(containers_data)} containers")
-        return jsonify(containers_data), 200
+        snapshot = yard.snapshot()
+        time_dependent = (fields is None or not Container.TIME_DEPENDENT_FIELDS.isdisjoint(fields) or
+                          any(name in request.args for name in TIME_DEPENDENT_FILTERS))
+        time_bucket = int(time.time() // config.CONTAINER_CACHE_TTL) if time_dependent else None
+        key = (snapshot.version, time_bucket, tuple(sorted(request.args.items(multi=True))))
+        etag = etag_for(key)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        now = datetime.now()
+        body = container_pages.get(key)
+        ids = [] if body is not None else filter_container_ids(snapshot, request.args, now)
+        if ids is None:
+            ids = snapshot.sorted_ids()
+        if body is None and limit is None and cursor is None:
+            containers = [snapshot.containers[container_id] for container_id in ids]
+            if len(containers) > config.CONTAINER_PAGE_MAX:
+                # Too large to keep in the cache: streamed, bounded by one serialization chunk
+                response = Response(stream_with_context(serialize_containers(containers, fields, now)), mimetype='application/json')
+                response.set_etag(etag)
+                app_logger.info(f"Streaming {len(containers)} containers")
+                return response
+            body = ''.join(serialize_containers(containers, fields, now))
+            container_pages.put(key, body)
+        elif body is None:
+            start = bisect_right(ids, cursor) if cursor is not None else 0
+            page_ids = ids[start:start + (limit or config.CONTAINER_PAGE_MAX)]
+            next_cursor = page_ids[-1] if page_ids and start + len(page_ids) < len(ids) else None
+            body = json.dumps({
+                "containers": [snapshot.containers[container_id].to_dict(now, fields) for container_id in page_ids],
+                "next_cursor": next_cursor,
+                "total": len(ids),
+                "version": snapshot.version
+            })
+            container_pages.put(key, body)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        app_logger.info(f"Retrieved containers (version {snapshot.version}, cursor {cursor})")
+        return response
     except Exception as e:
         app_logger.error(f"Error retrieving containers: {str(e)}")
         return jsonify({"error": "Error retrieving containers"}), 500
@@ -100,27 +475,28 @@ def get_containers():
 @require_auth
 def add_container():
     try:
-        data = request.json
-        container = Container(
-            id=data['id'],
-            weight=data['weight'],
-            destination=data['destination'],
-            arrival_date=data['arrival_date'],
-            departure_date=data['departure_date']
-        )
-        position = optimizer.optimize_placement(container)
-        if yard.add_container(container, position):
-            db = next(get_db())
-            db.add(container)
-            db.commit()
-            app_logger.info(f"Container {container.id} added successfully")
-            return jsonify({"message": "Container added successfully"}), 201
-        else:
-            app_logger.error(f"Unable to place container {container.id}")
-            return jsonify({"error": "Unable to place container"}), 400
+        container = container_from_json(request.json)
+        # Concurrent requests are micro-batched by the scheduler, which also adds the container to the yard
+        result = placement_scheduler.place(container, timeout=config.INFERENCE_TIMEOUT)
+        if not result['placed']:
+            app_logger.error(f"Unable to place container {container.id}: {result['error']}")
+            status = 409 if result['error'] == "No feasible slot available" else 400
+            return jsonify({"error": result['error']}), status
+        db = get_session()
+        try:
+            store_containers(db, [container])
+        except SQLAlchemyError:
+            db.rollback()
+            yard.remove_container(container.id)
+            raise
+        app_logger.info(f"Container {container.id} added successfully")
+        return jsonify({"message": "Container added successfully"}), 201
     except KeyError as e:
         app_logger.error(f"Missing required field: {str(e)}")
         return jsonify({"error": f"Missing required field: {str(e)}"}), 400
+    except TimeoutError:
+        app_logger.error(f"Placement of container {container.id} timed out")
+        return jsonify({"error": "Placement timed out"}), 503
     except SQLAlchemyError as e:
         app_logger.error(f"Database error: {str(e)}")
         return jsonify({"error": "Database error"}), 500
@@ -132,7 +508,7 @@ def add_container():
 @require_auth
 def container_operations(container_id):
     if request.method == 'GET':
-        container = yard.containers.get(container_id)
+        container = yard.snapshot().containers.get(container_id)
         if container:
             app_logger.info(f"Retrieved container {container_id}")
             return jsonify(container.to_dict()), 200
@@ -140,21 +516,27 @@ def container_operations(container_id):
         return jsonify({"error": f"Container {container_id} not found"}), 404
 
     elif request.method == 'PUT':
+        db = get_session()
         try:
             container = yard.containers.get(container_id)
             if not container:
                 app_logger.error(f"Container {container_id} not found")
                 return jsonify({"error": f"Container {container_id} not found"}), 404
             
-            data = request.json
-            container.weight = data.get('weight', container.weight)
-            container.destination = data.get('destination', container.destination)
-            container.arrival_date = container._parse_date(data.get('arrival_date', container.arrival_date))
-            container.departure_date = container._parse_date(data.get('departure_date', container.departure_date))
-            
-            db = next(get_db())
+            try:
+                changes = parse_container_update(request.get_json(silent=True))
+            except ValueError as e:
+                app_logger.error(f"Invalid update for container {container_id}: {str(e)}")
+                return jsonify({"error": str(e)}), 400
+            with yard.lock:
+                for name, value in changes.items():
+                    setattr(container, name, value)
+                yard.refresh_container(container_id)
+                values = {name: getattr(container, name) for name in ('weight', 'destination', 'arrival_date', 'departure_date')}
+
+            db.execute(update(Container).where(Container.id == container_id).values(**values))
             db.commit()
-            optimizer.reoptimize()
+            reoptimize()
             app_logger.info(f"Container {container_id} updated successfully")
             return jsonify({"message": f"Container {container_id} updated successfully"}), 200
         except SQLAlchemyError as e:
@@ -167,13 +549,11 @@ def container_operations(container_id):
 
     elif request.method == 'DELETE':
         if yard.remove_container(container_id):
+            db = get_session()
             try:
-                db = next(get_db())
-                container = db.query(Container).get(container_id)
-                if container:
-                    db.delete(container)
-                    db.commit()
-                optimizer.reoptimize()
+                db.execute(delete(Container).where(Container.id == container_id))
+                db.commit()
+                reoptimize()
                 app_logger.info(f"Container {container_id} removed successfully")
                 return jsonify({"message": f"Container {container_id} removed successfully"}), 200
             except SQLAlchemyError as e:
@@ -209,7 +589,7 @@ def manual_place_container(container_id):
             return jsonify({"error": f"Container {container_id} not found"}), 404
         
         if yard.move_container(container_id, (position['x'], position['y'], position['z'])):
-            optimizer.reoptimize()
+            reoptimize()
             app_logger.info(f"Container {container_id} manually placed successfully")
             return jsonify({"message": f"Container {container_id} manually placed successfully"}), 200
         app_logger.error(f"Unable to place container {container_id} at specified position")
@@ -222,9 +602,13 @@ def manual_place_container(container_id):
 @require_auth
 def trigger_reoptimization():
     try:
-        optimizer.reoptimize()
-        app_logger.info("Manual reoptimization triggered successfully")
-        return jsonify({"message": "Reoptimization triggered successfully"}), 200
+        moves = reoptimize(full=request.args.get('full', 'true').lower() in ('true', '1'))
+        # The yard already reflects the moves; the plan is the order the crane should execute them in
+        plan = plan_moves(yard, moves)
+        app_logger.info(f"Manual reoptimization triggered successfully: {len(moves)} moves, "
+                        f"estimated {plan.total_time:.1f} crane time (unordered {plan.unordered_time:.1f})")
+        return jsonify({"message": "Reoptimization triggered successfully", "moves": len(moves),
+                        "plan": plan.to_dict()}), 200
     except Exception as e:
         app_logger.error(f"Error triggering reoptimization: {str(e)}")
         return jsonify({"error": "Error triggering reoptimization"}), 500
@@ -232,27 +616,50 @@ def trigger_reoptimization():
 @app.route('/logs', methods=['GET'])
 @require_auth
 def get_logs():
+    # Last `lines` lines of a log, read from the end of the file. With follow=true the response
+    # is NDJSON: those lines, then new ones as they are written, for up to `timeout` seconds.
+    log_type = request.args.get('type', 'app')
+    if log_type not in LOG_TYPES:
+        return jsonify({"error": f"Unknown log type, expected one of {', '.join(LOG_TYPES)}"}), 400
+    lines = request.args.get('lines', 100, type=int)
+    if not 0 <= lines <= config.LOG_TAIL_MAX_LINES:
+        return jsonify({"error": f"lines must be between 0 and {config.LOG_TAIL_MAX_LINES}"}), 400
     try:
-        log_type = request.args.get('type', 'app')
-        log_file = os.path.join('backend', 'logs', f'{log_type}.log')
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                logs = f.readlines()[-100:]  # Get last 100 lines
-            return jsonify(logs), 200
-        return jsonify({"error": "Log file not found"}), 404
+        log_file = log_path(log_type)
+        if not os.path.exists(log_file):
+            return jsonify({"error": "Log file not found"}), 404
+        logs, offset = tail(log_file, lines)
+        if request.args.get('follow', '').lower() in ('true', '1'):
+            timeout = min(request.args.get('timeout', config.LOG_FOLLOW_TIMEOUT, type=float), config.LOG_FOLLOW_TIMEOUT)
+            def stream():
+                for line in logs:
+                    yield json.dumps(line) + "\n"
+                for line in follow(log_file, offset, timeout):
+                    yield json.dumps(line) + "\n"
+            return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+        return jsonify(logs), 200
     except Exception as e:
         app_logger.error(f"Error retrieving logs: {str(e)}")
         return jsonify({"error": "Error retrieving logs"}), 500
 
+@app.route('/inference_stats', methods=['GET'])
+@require_auth
+def get_inference_stats():
+    return jsonify(placement_scheduler.get_stats()), 200
+
 @app.route('/training_progress', methods=['GET'])
 @require_auth
 def get_training_progress():
     try:
-        progress = optimizer.get_training_progress()
+        progress = dict(optimizer.get_training_progress(),
+                        policy_version=optimizer.policy_version,
+                        worker_alive=training_worker.is_alive())
         return jsonify(progress), 200
     except Exception as e:
         app_logger.error(f"Error retrieving training progress: {str(e)}")
         return jsonify({"error": "Error retrieving training progress"}), 500
 
+startup["import_seconds"] = round(time.perf_counter() - import_started, 4)
+
 if __name__ == '__main__':
-    app.run(debug=config.DEBUG)
+    create_app().run(debug=config.DEBUG)
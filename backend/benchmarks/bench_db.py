@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.models.container import Container
+from backend.models.database import Base, make_engine, upsert
+from backend.simulator.simulator import generate_containers
+
+
+def previous_single(url, containers):
+    # The old POST path: default engine, a new session per container, ORM add and commit
+    Session = sessionmaker(bind=create_engine(url))
+    for container in containers:
+        db = Session()
+        db.add(container)
+        db.commit()
+
+
+def previous_batch(url, containers, batch_size):
+    Session = sessionmaker(bind=create_engine(url))
+    db = Session()
+    for start in range(0, len(containers), batch_size):
+        db.bulk_save_objects(containers[start:start + batch_size])
+        db.commit()
+
+
+def tuned_single(url, containers):
+    # Tuned engine, one reused session, one upsert and commit per container
+    db = sessionmaker(bind=make_engine(url))()
+    for container in containers:
+        upsert(db, Container.__table__, [container.to_row()])
+        db.commit()
+    db.close()
+
+
+def tuned_batch(url, containers, batch_size):
+    db = sessionmaker(bind=make_engine(url))()
+    for start in range(0, len(containers), batch_size):
+        upsert(db, Container.__table__, [container.to_row() for container in containers[start:start + batch_size]])
+        db.commit()
+    db.close()
+
+
+def containers_per_second(write, count, *args):
+    # Every path gets a fresh SQLite file and fresh containers, so no session state is shared
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        setup = create_engine(url)
+        Base.metadata.create_all(bind=setup)
+        setup.dispose()
+        containers = generate_containers(count, seed=0)
+        started = time.perf_counter()
+        write(url, containers, *args)
+        return count / (time.perf_counter() - started)
+
+
+def run(single_count=500, batch_count=20000, batch_size=500):
+    return {
+        "single_previous": containers_per_second(previous_single, single_count),
+        "single_tuned": containers_per_second(tuned_single, single_count),
+        "batch_previous": containers_per_second(previous_batch, batch_count, batch_size),
+        "batch_tuned": containers_per_second(tuned_batch, batch_count, batch_size)
+    }
+
+
+if __name__ == '__main__':
+    result = run()
+    print(f"single inserts: {result['single_previous']:.0f} -> {result['single_tuned']:.0f} containers/s, "
+          f"batches: {result['batch_previous']:.0f} -> {result['batch_tuned']:.0f} containers/s")
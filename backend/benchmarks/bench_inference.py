@@ -0,0 +1,31 @@
+import time
+from backend.benchmarks.bench_yard import make_yard, fill_yard
+from backend.optimizer.numpy_inference import NumpyPolicy
+from backend.optimizer.optimizer import Optimizer
+
+
+def time_per_call(fn, repeat):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(length=10, width=10, height=5, fill=0.5):
+    optimizer = Optimizer(fill_yard(make_yard(length, width, height), fill))
+    optimizer.epsilon = 0
+    state = optimizer._get_state()
+    quantized = NumpyPolicy(optimizer.policy.get_weights(), quantize=True)
+    container = next(iter(optimizer.yard.containers.values()))
+    return {
+        "keras_predict_us": time_per_call(lambda: optimizer.model.predict(state, verbose=0), 20) * 1e6,
+        "numpy_float32_us": time_per_call(lambda: optimizer.policy.predict(state), 2000) * 1e6,
+        "numpy_int8_us": time_per_call(lambda: quantized.predict(state), 2000) * 1e6,
+        "placement_us": time_per_call(lambda: optimizer.optimize_placement(container), 500) * 1e6
+    }
+
+
+if __name__ == '__main__':
+    for name, value in run().items():
+        print(f"{name:>18}: {value:.1f}")
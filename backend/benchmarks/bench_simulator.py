@@ -0,0 +1,23 @@
+import time
+from backend.benchmarks.bench_yard import make_yard
+from backend.optimizer.optimizer import Optimizer
+from backend.simulator.simulator import YardSimulator, collect_experience
+
+
+def run(length=10, width=10, height=5, num_envs=64, steps=200):
+    yard = make_yard(length, width, height)
+    results = {}
+    for strategy in Optimizer.STRATEGIES:
+        optimizer = Optimizer(yard, memory_size=num_envs * steps, strategy=strategy)
+        env = YardSimulator(yard.config, num_envs=num_envs, seed=0)
+        env.reset()
+        collect_experience(env, optimizer, 5)  # warm-up
+        start = time.perf_counter()
+        collected = collect_experience(env, optimizer, steps)
+        results[f"{strategy}_transitions_per_s"] = collected['transitions'] / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == '__main__':
+    for name, value in run().items():
+        print(f"{name:>28}: {value:.0f}")
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IMPORT_SCRIPT = "import backend.app"
+FIRST_INFERENCE_SCRIPT = """
+import time
+started = time.perf_counter()
+from backend.app import create_app, optimizer
+create_app(start_background=False)
+optimizer.warm_up()
+print(time.perf_counter() - started)
+"""
+
+
+def time_subprocess(script, env=None):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return time.perf_counter() - started, output
+
+
+def run(repeat=3):
+    env = dict(os.environ, DATABASE_URL=os.environ.get("DATABASE_URL", "sqlite:///:memory:"))
+    import_times = [time_subprocess(IMPORT_SCRIPT, env)[0] for _ in range(repeat)]
+    warm = [float(time_subprocess(FIRST_INFERENCE_SCRIPT, env)[1].strip().splitlines()[-1]) for _ in range(repeat)]
+    return {"import_seconds": min(import_times), "ready_seconds": min(warm)}
+
+
+if __name__ == '__main__':
+    result = run()
+    print(f"cold import {result['import_seconds']:.2f}s, import + init + warm-up {result['ready_seconds']:.2f}s")
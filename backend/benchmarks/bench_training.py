@@ -0,0 +1,62 @@
+import time
+import numpy as np
+from backend.benchmarks.bench_yard import make_yard
+from backend.optimizer.optimizer import Optimizer
+
+
+def fill_memory(optimizer, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    optimizer.memory.push_batch(
+        (rng.random((samples, optimizer.state_size)) < 0.3).astype(np.float32),
+        rng.integers(optimizer.action_size, size=samples),
+        rng.normal(size=samples),
+        (rng.random((samples, optimizer.state_size)) < 0.3).astype(np.float32),
+        rng.random(samples) < 0.1
+    )
+
+
+def per_sample_step(optimizer, minibatch):
+    # The previous training loop: two predicts and one fit per sample
+    states, actions, rewards, next_states, dones = minibatch
+    for i in range(len(actions)):
+        state, next_state = states[i:i + 1], next_states[i:i + 1]
+        target = rewards[i]
+        if not dones[i]:
+            target = rewards[i] + optimizer.gamma * np.amax(optimizer.model.predict(next_state, verbose=0)[0])
+        target_f = optimizer.model.predict(state, verbose=0)
+        target_f[0][actions[i]] = target
+        optimizer.model.fit(state, target_f, epochs=1, verbose=0)
+
+
+def batched_step(optimizer, minibatch):
+    optimizer._train_step(*minibatch)
+
+
+def samples_per_second(step, optimizer, batch_size, steps):
+    minibatch = optimizer.memory.sample(batch_size)[:5]
+    step(optimizer, minibatch)  # warm-up
+    start = time.perf_counter()
+    for _ in range(steps):
+        step(optimizer, minibatch)
+    return batch_size * steps / (time.perf_counter() - start)
+
+
+def run(batch_size=32):
+    optimizer = Optimizer(make_yard(10, 10, 5))
+    fill_memory(optimizer, optimizer.memory.capacity)
+    per_sample = samples_per_second(per_sample_step, optimizer, batch_size, 2)
+    batched = samples_per_second(batched_step, optimizer, batch_size, 20)
+    start = time.perf_counter()
+    for _ in range(100):
+        optimizer.memory.sample(batch_size)
+    sample_us = (time.perf_counter() - start) / 100 * 1e6
+    memory_mb = (optimizer.memory.states.nbytes + optimizer.memory.next_states.nbytes) / 2 ** 20
+    return {"batch_size": batch_size, "per_sample_sps": per_sample, "batched_sps": batched,
+            "speedup": batched / per_sample, "sample_us": sample_us, "memory_mb": memory_mb}
+
+
+if __name__ == '__main__':
+    result = run()
+    print(f"batch {result['batch_size']}: per-sample {result['per_sample_sps']:.0f} samples/s, "
+          f"batched {result['batched_sps']:.0f} samples/s, speedup {result['speedup']:.0f}x")
+    print(f"replay sample {result['sample_us']:.0f}us per batch, {result['memory_mb']:.1f} MB of states")
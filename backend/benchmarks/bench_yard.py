@@ -0,0 +1,77 @@
+import random
+import time
+from datetime import datetime, timedelta
+from backend.models.container import Container
+from backend.models.yard import Yard
+from backend.models.yard_config import YardConfig
+
+
+def make_yard(length, width, height):
+    config = YardConfig(
+        length=length, width=width, height=height,
+        energy_consumption_rate=0.1,
+        carbon_emission_factor=0.5,
+        max_weight_per_stack=10 ** 9,
+        crane_speed=2,
+        crane_energy_consumption=5
+    )
+    return Yard(config)
+
+
+def fill_yard(yard, fill, seed=0):
+    rng = random.Random(seed)
+    cells = [(x, y, z) for x in range(yard.config.length) for y in range(yard.config.width) for z in range(yard.config.height)]
+    rng.shuffle(cells)
+    base = datetime(2024, 1, 1)
+    for i, position in enumerate(cells[:int(len(cells) * fill)]):
+        container = Container(
+            id=f"C{i:07d}",
+            weight=rng.randint(1000, 30000),
+            destination=rng.choice(["Port A", "Port B", "Port C"]),
+            arrival_date=base.strftime("%Y-%m-%d"),
+            departure_date=(base + timedelta(days=rng.randint(1, 60))).strftime("%Y-%m-%d")
+        )
+        yard.add_container(container, position)
+    return yard
+
+
+def scan_position(yard, container_id):
+    # The previous full-grid scan, kept as the reference for the speedup
+    for x in range(yard.config.length):
+        for y in range(yard.config.width):
+            for z in range(yard.config.height):
+                if yard.grid[x][y][z] and yard.grid[x][y][z].id == container_id:
+                    return (x, y, z)
+    return None
+
+
+def time_per_call(fn, args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for arg in args:
+            fn(arg)
+    return (time.perf_counter() - start) / (len(args) * repeat)
+
+
+def run(length=200, width=40, height=6, fill=0.5, samples=200):
+    yard = fill_yard(make_yard(length, width, height), fill)
+    ids = random.Random(1).sample(list(yard.containers), min(samples, len(yard.containers)))
+    scan = time_per_call(lambda cid: scan_position(yard, cid), ids[:20])
+    indexed = time_per_call(yard.get_container_position, ids, repeat=100)
+    free_slots = time_per_call(lambda _: yard.free_slots(), range(20))
+    return {
+        "yard": f"{length}x{width}x{height}",
+        "containers": len(yard.containers),
+        "scan_us": scan * 1e6,
+        "indexed_us": indexed * 1e6,
+        "speedup": scan / indexed,
+        "free_slots_us": free_slots * 1e6
+    }
+
+
+if __name__ == '__main__':
+    for size in [(10, 10, 5), (50, 20, 6), (200, 40, 6)]:
+        result = run(*size)
+        print(f"{result['yard']:>10} {result['containers']:>7} containers: "
+              f"scan {result['scan_us']:.1f}us, indexed {result['indexed_us']:.3f}us, speedup {result['speedup']:.0f}x, "
+              f"free slots {result['free_slots_us']:.1f}us")
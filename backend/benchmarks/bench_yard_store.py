@@ -0,0 +1,38 @@
+import random
+import tempfile
+import time
+from backend.benchmarks.bench_yard import make_yard
+from backend.models.yard_store import YardStore
+from backend.simulator.simulator import generate_containers
+
+
+def run(length=250, width=80, height=6, count=100000, journal=1000, seed=0):
+    # Snapshot write time, then restore time of a fresh yard from the snapshot plus `journal` moves
+    rng = random.Random(seed)
+    cells = [(x, y, z) for x in range(length) for y in range(width) for z in range(height)]
+    rng.shuffle(cells)
+    yard = make_yard(length, width, height)
+    containers = generate_containers(count, seed=seed)
+    yard.load(containers, cells[:count])
+    with tempfile.TemporaryDirectory() as directory:
+        store = YardStore(directory, compact_every=10 ** 9)
+        store.attach(yard)
+        started = time.perf_counter()
+        store.compact()
+        snapshot_seconds = time.perf_counter() - started
+        free = cells[count:]
+        for i in range(journal):
+            yard.move_container(containers[i].id, free[i])
+        store.close()
+
+        restored = make_yard(length, width, height)
+        stats = YardStore(directory).attach(restored)
+        assert restored.positions == yard.positions
+    return {"containers": count, "journal": journal, "snapshot_seconds": snapshot_seconds,
+            "restore_seconds": stats["seconds"], "replayed": stats["replayed"]}
+
+
+if __name__ == '__main__':
+    result = run()
+    print(f"{result['containers']} containers: snapshot {result['snapshot_seconds']:.2f}s, "
+          f"restore with {result['replayed']} journal entries {result['restore_seconds']:.2f}s")
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from backend.benchmarks.bench_yard import make_yard, fill_yard
+from backend.benchmarks.bench_training import fill_memory
+from backend.models.container import Container
+from backend.optimizer.optimizer import Optimizer
+
+# python -m backend.benchmarks.suite --quick --output baseline.json
+# python -m backend.benchmarks.suite --quick --baseline baseline.json   (exit code 1 on regressions)
+
+SIZES = [(10, 10, 5), (50, 20, 6), (100, 40, 8), (200, 50, 8)]
+FILLS = [0.1, 0.5, 0.95]
+QUICK_SIZES = [(10, 10, 5), (50, 20, 6)]
+QUICK_FILLS = [0.1, 0.95]
+OPERATIONS = ['add_container', 'remove_container', 'get_container_position', 'move_container', 'get_state',
+              'optimize_placement', 'reoptimize', 'calculate_metrics', 'calculate_metrics_full', 'metrics_after_write',
+              'snapshot_after_write', 'train']
+SEED = 0
+
+
+def measure(fn, args, repeat=5):
+    # Median and best per-call time over `repeat` rounds of calling fn on every arg
+    fn(args[0])  # warm-up
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in args:
+            fn(arg)
+        rounds.append((time.perf_counter() - start) / len(args))
+    return {"median_us": statistics.median(rounds) * 1e6, "min_us": min(rounds) * 1e6, "calls": len(args) * repeat}
+
+
+def paired(first, second, args, repeat=5):
+    # Times two operations that undo each other (remove/add, move/move back) separately
+    first_times, second_times = [], []
+    for _ in range(repeat):
+        for arg in args:
+            start = time.perf_counter()
+            first(arg)
+            middle = time.perf_counter()
+            second(arg)
+            first_times.append(middle - start)
+            second_times.append(time.perf_counter() - middle)
+    summary = lambda times: {"median_us": statistics.median(times) * 1e6, "min_us": min(times) * 1e6, "calls": len(times)}
+    return summary(first_times), summary(second_times)
+
+
+def new_container(i, weight=1000):
+    return Container(id=f"BENCH{i:07d}", weight=weight, destination="Port A",
+                     arrival_date="2024-01-01", departure_date="2024-02-01")
+
+
+def run_case(size, fill, operations, samples=100, train_batch_size=32):
+    random.seed(SEED)
+    np.random.seed(SEED)
+    yard = fill_yard(make_yard(*size), fill, seed=SEED)
+    optimizer = Optimizer(yard, memory_size=4 * train_batch_size)
+    optimizer.epsilon = 0
+    ids = random.Random(SEED).sample(sorted(yard.containers), min(samples, len(yard.containers)))
+    ops = {}
+
+    if 'add_container' in operations or 'remove_container' in operations:
+        positions = {container_id: yard.positions[container_id] for container_id in ids}
+        containers = {container_id: yard.containers[container_id] for container_id in ids}
+        removed, added = paired(yard.remove_container, lambda cid: yard.add_container(containers[cid], positions[cid]), ids)
+        ops['remove_container'], ops['add_container'] = removed, added
+    if 'get_container_position' in operations:
+        ops['get_container_position'] = measure(yard.get_container_position, ids, repeat=20)
+    if 'move_container' in operations:
+        free = [tuple(int(v) for v in cell) for cell in yard.free_slots()[:1]]
+        if free:
+            origins = {container_id: yard.positions[container_id] for container_id in ids}
+            ops['move_container'], _ = paired(lambda cid: yard.move_container(cid, free[0]),
+                                              lambda cid: yard.move_container(cid, origins[cid]), ids)
+    if 'get_state' in operations:
+        ops['get_state'] = measure(lambda _: optimizer._get_state(), range(20))
+    if 'optimize_placement' in operations:
+        candidate = new_container(0)
+        ops['optimize_placement'] = measure(lambda _: optimizer.optimize_placement(candidate), range(10))
+    if 'reoptimize' in operations:
+        def reoptimize(_):
+            yard.dirty.update(ids[:20])
+            optimizer.reoptimize(max_moves=20)
+        ops['reoptimize'] = measure(reoptimize, range(3), repeat=3)
+    if 'calculate_metrics' in operations:
+        ops['calculate_metrics'] = measure(lambda _: optimizer.calculate_metrics(), range(100))
+    if 'metrics_after_write' in operations:
+        # Every read follows a mutation, so nothing cached for the previous version can be reused
+        _, ops['metrics_after_write'] = paired(yard.refresh_container, lambda _: optimizer.calculate_metrics(), ids)
+    if 'snapshot_after_write' in operations:
+        # A reader holds each snapshot until after the next write, which then pays the copy-on-write
+        held = []
+        def write(container_id):
+            yard.refresh_container(container_id)
+            held.clear()
+        ops['write_after_snapshot'], ops['snapshot_after_write'] = paired(write, lambda _: held.append(yard.snapshot()), ids)
+    if 'calculate_metrics_full' in operations:
+        ops['calculate_metrics_full'] = measure(lambda _: optimizer.calculate_metrics(full=True), range(3), repeat=3)
+    if 'train' in operations:
+        with tempfile.TemporaryDirectory() as directory:
+            optimizer.model_path = os.path.join(directory, 'dqn_model.h5')
+            optimizer.policy_path = os.path.join(directory, 'dqn_model.npz')
+            fill_memory(optimizer, optimizer.memory.capacity, seed=SEED)
+            ops['train'] = measure(lambda _: optimizer.train(train_batch_size), range(1), repeat=3)
+
+    return {"size": "x".join(map(str, size)), "cells": int(np.prod(size)), "fill": fill,
+            "containers": len(yard.containers), "ops": ops}
+
+
+def scaling_exponents(results):
+    # Slope of log(time) against log(cells) per operation and fill level; ~0 is constant time,
+    # ~1 linear in yard size. Unlike absolute timings this is comparable across machines.
+    exponents = {}
+    for fill in sorted({result['fill'] for result in results}):
+        cases = sorted((result for result in results if result['fill'] == fill), key=lambda result: result['cells'])
+        if len(cases) < 2:
+            continue
+        for op in cases[0]['ops']:
+            points = [(case['cells'], case['ops'][op]['median_us']) for case in cases if op in case['ops']]
+            if len(points) < 2:
+                continue
+            cells, times = np.log([p[0] for p in points]), np.log([max(p[1], 1e-3) for p in points])
+            exponents.setdefault(op, {})[str(fill)] = float(np.polyfit(cells, times, 1)[0])
+    return exponents
+
+
+def compare(current, baseline, tolerance=0.25, exponent_tolerance=0.2):
+    # Regressions against a stored baseline: a case whose median time grew by more than
+    # `tolerance`, or an operation whose scaling exponent grew by more than `exponent_tolerance`
+    regressions = []
+    baseline_cases = {(case['size'], case['fill']): case for case in baseline.get('results', [])}
+    for case in current['results']:
+        old_case = baseline_cases.get((case['size'], case['fill']))
+        if old_case is None:
+            continue
+        for op, timing in case['ops'].items():
+            old = old_case['ops'].get(op)
+            if old and timing['median_us'] > old['median_us'] * (1 + tolerance):
+                regressions.append({"kind": "time", "op": op, "size": case['size'], "fill": case['fill'],
+                                    "baseline": old['median_us'], "current": timing['median_us'],
+                                    "ratio": timing['median_us'] / old['median_us']})
+    for op, fills in current.get('scaling', {}).items():
+        for fill, exponent in fills.items():
+            old = baseline.get('scaling', {}).get(op, {}).get(fill)
+            if old is not None and exponent > old + exponent_tolerance:
+                regressions.append({"kind": "scaling", "op": op, "fill": float(fill),
+                                    "baseline": old, "current": exponent})
+    return regressions
+
+
+def run(sizes=SIZES, fills=FILLS, operations=OPERATIONS, samples=100):
+    results = []
+    for size in sizes:
+        for fill in fills:
+            started = time.perf_counter()
+            results.append(run_case(size, fill, operations, samples))
+            print(f"{results[-1]['size']:>10} fill {fill:.2f}: {results[-1]['containers']} containers "
+                  f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "processor": platform.processor(), "seed": SEED, "timestamp": time.time()},
+        "results": results,
+        "scaling": scaling_exponents(results)
+    }
+
+
+def parse_size(text):
+    return tuple(int(v) for v in text.lower().split('x'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Yard and optimizer micro-benchmarks")
+    parser.add_argument('--sizes', help="comma separated LxWxH list, e.g. 10x10x5,200x50x8")
+    parser.add_argument('--fills', help="comma separated fill levels, e.g. 0.1,0.95")
+    parser.add_argument('--ops', help=f"comma separated subset of {','.join(OPERATIONS)}")
+    parser.add_argument('--quick', action='store_true', help="small sizes and fill levels only")
+    parser.add_argument('--samples', type=int, default=100)
+    parser.add_argument('--output', help="write results as JSON to this file instead of stdout")
+    parser.add_argument('--baseline', help="JSON results to compare against; exits 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown per case")
+    parser.add_argument('--exponent-tolerance', type=float, default=0.2, help="allowed growth of scaling exponents")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')] if args.sizes else (QUICK_SIZES if args.quick else SIZES)
+    fills = [float(fill) for fill in args.fills.split(',')] if args.fills else (QUICK_FILLS if args.quick else FILLS)
+    operations = args.ops.split(',') if args.ops else OPERATIONS
+    results = run(sizes, fills, operations, args.samples)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['regressions'] = compare(results, json.load(f), args.tolerance, args.exponent_tolerance)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    for regression in results.get('regressions', []):
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if results.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
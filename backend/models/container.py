@@ -2,51 +2,35 @@ from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean
 from .database import Base
 from datetime import datetime, timedelta
 
-class Container(Base):
-    __tablename__ = "containers"
+EPOCH = datetime(1970, 1, 1)
 
-    id = Column(String, primary_key=True, index=True)
-    weight = Column(Float)
-    destination = Column(String)
-    arrival_date = Column(DateTime)
-    departure_date = Column(DateTime)
-    content_type = Column(String)
-    is_refrigerated = Column(Boolean, default=False)
-    priority = Column(Integer, default=0)
-    last_moved = Column(DateTime)
+def to_timestamp(value):
+    # Naive seconds since EPOCH; matches the naive datetime arithmetic used below
+    return (value - EPOCH).total_seconds() if value else None
 
-    def __init__(self, id, weight, destination, arrival_date, departure_date, content_type=None, is_refrigerated=False, priority=0):
-        self.id = id
-        self.weight = float(weight)
-        self.destination = destination
-        self.arrival_date = self._parse_date(arrival_date)
-        self.departure_date = self._parse_date(departure_date)
-        self.content_type = content_type
-        self.is_refrigerated = is_refrigerated
-        self.priority = priority
-        self.last_moved = datetime.now()
-
-    def _parse_date(self, date_string):
-        try:
-            return datetime.strptime(date_string, "%Y-%m-%d")
-        except ValueError:
-            return None
+class ContainerMixin:
+    # Behaviour shared by the ORM model and the plain containers restored from the yard store
+    FIELDS = ("id", "weight", "destination", "arrival_date", "departure_date", "content_type",
+              "is_refrigerated", "priority", "days_until_departure", "is_overdue", "time_since_last_move")
+    TIME_DEPENDENT_FIELDS = frozenset(("days_until_departure", "is_overdue", "time_since_last_move"))
+    COLUMNS = ("id", "weight", "destination", "arrival_date", "departure_date", "content_type",
+               "is_refrigerated", "priority", "last_moved")
 
     def __repr__(self):
         return f"Container({self.id}, {self.weight}, {self.destination}, {self.content_type})"
 
-    def days_until_departure(self):
+    def days_until_departure(self, now=None):
         if self.departure_date:
-            return max((self.departure_date - datetime.now()).days, 0)
+            return max((self.departure_date - (now or datetime.now())).days, 0)
         return None
 
-    def is_overdue(self):
+    def is_overdue(self, now=None):
         if self.departure_date:
-            return datetime.now() > self.departure_date
+            return (now or datetime.now()) > self.departure_date
         return False
 
-    def time_since_last_move(self):
-        return (datetime.now() - self.last_moved).total_seconds() / 3600  # Return hours
+    def time_since_last_move(self, now=None):
+        return ((now or datetime.now()) - self.last_moved).total_seconds() / 3600  # Return hours
 
     def update_last_moved(self):
         self.last_moved = datetime.now()
@@ -57,17 +41,70 @@ class Container(Base):
             return days_in_storage * cost_per_day
         return 0
 
-    def to_dict(self):
-        return {
+    def to_row(self):
+        # Column values for Core insert/update statements, which skip the ORM unit of work
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def to_dict(self, now=None, fields=None):
+        # One clock reading for all time-dependent fields; `fields` limits the output to those keys
+        now = now or datetime.now()
+        data = {
             "id": self.id,
             "weight": self.weight,
             "destination": self.destination,
-            "arrival_date": self.arrival_date.strftime("%Y-%m-%d") if self.arrival_date else None,
-            "departure_date": self.departure_date.strftime("%Y-%m-%d") if self.departure_date else None,
+            "arrival_date": self.arrival_date.date().isoformat() if self.arrival_date else None,
+            "departure_date": self.departure_date.date().isoformat() if self.departure_date else None,
             "content_type": self.content_type,
             "is_refrigerated": self.is_refrigerated,
             "priority": self.priority,
-            "days_until_departure": self.days_until_departure(),
-            "is_overdue": self.is_overdue(),
-            "time_since_last_move": self.time_since_last_move()
+            "days_until_departure": self.days_until_departure(now),
+            "is_overdue": self.is_overdue(now),
+            "time_since_last_move": self.time_since_last_move(now)
         }
+        if fields is not None:
+            return {field: data[field] for field in fields}
+        return data
+
+class Container(ContainerMixin, Base):
+    __tablename__ = "containers"
+
+    id = Column(String, primary_key=True, index=True)
+    weight = Column(Float)
+    destination = Column(String)
+    arrival_date = Column(DateTime)
+    departure_date = Column(DateTime)
+    content_type = Column(String)
+    is_refrigerated = Column(Boolean, default=False)
+    priority = Column(Integer, default=0)
+    last_moved = Column(DateTime)
+
+    def __init__(self, id, weight, destination, arrival_date, departure_date, content_type=None, is_refrigerated=False, priority=0):
+        self.id = id
+        self.weight = float(weight)
+        self.destination = destination
+        self.arrival_date = self._parse_date(arrival_date)
+        self.departure_date = self._parse_date(departure_date)
+        self.content_type = content_type
+        self.is_refrigerated = is_refrigerated
+        self.priority = priority
+        self.last_moved = datetime.now()
+
+    def _parse_date(self, date_string):
+        try:
+            return datetime.strptime(date_string, "%Y-%m-%d")
+        except ValueError:
+            return None
+
+class StoredContainer(ContainerMixin):
+    # A container restored from the yard store. It behaves like Container but is a plain object
+    # outside the ORM: the yard only writes through Core statements (to_row), and a whole yard
+    # is rebuilt without SQLAlchemy instrumentation or __init__'s date parsing.
+    @classmethod
+    def from_rows(cls, rows):
+        # Inverse of to_row for already-typed values; rows are mappings or (name, value) pairs
+        containers = []
+        for row in rows:
+            container = cls.__new__(cls)
+            container.__dict__.update(row)
+            containers.append(container)
+        return containers
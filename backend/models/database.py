@@ -1,9 +1,33 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from ..utils.config import config
 
-engine = create_engine(config.DATABASE_URL)
+def engine_options(backend):
+    # SQLite connections are cheap and file-locked, so it keeps the default pool and caches more
+    # prepared statements per connection; server databases get a bounded, health-checked pool
+    if backend == 'sqlite':
+        return {"connect_args": {"check_same_thread": False, "cached_statements": config.DB_STATEMENT_CACHE}}
+    return {"pool_size": config.DB_POOL_SIZE, "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_recycle": config.DB_POOL_RECYCLE, "pool_pre_ping": config.DB_POOL_PRE_PING}
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run during a write; with WAL, synchronous=NORMAL only syncs at checkpoints
+    cursor = dbapi_connection.cursor()
+    if config.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")  # in-memory databases keep journal_mode=memory
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.close()
+
+def make_engine(url):
+    engine = create_engine(url, **engine_options(make_url(url).get_backend_name()))
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', set_sqlite_pragmas)
+    return engine
+
+engine = make_engine(config.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -14,3 +38,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def upsert(db, table, rows):
+    # One executemany of a single statement; rows whose primary key exists are overwritten.
+    # SQLite and PostgreSQL use ON CONFLICT, other databases delete the existing rows first.
+    if not rows:
+        return
+    keys = [column.name for column in table.primary_key.columns]
+    dialects = {'sqlite': sqlite, 'postgresql': postgresql}
+    dialect = dialects.get(db.get_bind().dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column.name: statement.excluded[column.name] for column in table.columns if column.name not in keys})
+    else:
+        key = table.columns[keys[0]]
+        db.execute(delete(table).where(key.in_([row[keys[0]] for row in rows])))
+        statement = insert(table)
+    db.execute(statement, rows)
@@ -1,58 +1,395 @@
+import threading
+import weakref
+import numpy as np
+from datetime import datetime
+from .container import to_timestamp
+from .yard_metrics import YardMetrics
+from .yard_index import YardIndex
+
+SECONDS_PER_DAY = 86400
+
+
+def blocking_cells(departures, occupancy):
+    # A container blocks when something below it in the same stack leaves earlier, so it has to
+    # be rehandled at least once. Works on (..., H) stacks; unknown departures count as never.
+    # Returns the blocking mask and each stack's earliest departure (inf when empty).
+    departures = np.where(occupancy & ~np.isnan(departures), departures, np.inf)
+    earliest = np.minimum.accumulate(departures, axis=-1)
+    blocking = np.zeros(occupancy.shape, dtype=bool)
+    blocking[..., 1:] = occupancy[..., 1:] & (earliest[..., :-1] < departures[..., 1:])
+    return blocking, earliest[..., -1]
+
+
+def container_columns(containers):
+    # Per-container lists used by Yard.load; departures as timestamps (None when unknown)
+    return {
+        "id": [container.id for container in containers],
+        "weight": [container.weight for container in containers],
+        "departure": [to_timestamp(container.departure_date) for container in containers],
+        "destination": [container.destination for container in containers],
+        "priority": [container.priority for container in containers],
+        "is_refrigerated": [container.is_refrigerated for container in containers]
+    }
+
+
+class YardSnapshot:
+    # Read-only view of the yard at one version; readers use it instead of the live dicts.
+    # It shares the yard's dicts and index until the next mutation, see Yard._detach.
+    def __init__(self, version, containers, positions, stack_heights, metrics, index):
+        self.version = version
+        self.containers = containers
+        self.positions = positions
+        self.stack_heights = stack_heights
+        self.metrics = metrics
+        self.index = index
+        self._sorted_ids = None
+
+    def sorted_ids(self):
+        # Container ids in listing order, computed once per snapshot
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self.containers)
+        return self._sorted_ids
+
+
 class Yard:
     def __init__(self, config):
         self.config = config
         self.containers = {}
+        # container id -> (x, y, z); the grid itself is the reverse (position -> container) map
+        self.positions = {}
         self.grid = [[[None for _ in range(config.height)] for _ in range(config.width)] for _ in range(config.length)]
 
+        # Array mirror of the grid, kept in sync by _place/_clear
+        shape = (config.length, config.width, config.height)
+        self.occupancy = np.zeros(shape, dtype=bool)
+        self.weights = np.zeros(shape, dtype=np.float64)
+        self.stack_heights = np.zeros(shape[:2], dtype=np.int64)  # highest occupied level + 1
+        self.stack_weights = np.zeros(shape[:2], dtype=np.float64)
+        self.departures = np.full(shape, np.nan)  # departure timestamps, NaN when empty or unknown
+
+        # Rehandle index: blocking containers and each stack's earliest departure, kept per stack
+        self.blocking = np.zeros(shape, dtype=bool)
+        self.stack_blocking = np.zeros(shape[:2], dtype=np.int64)
+        self.stack_min_departure = np.full(shape[:2], np.inf)
+
+        # Optimizer input: present, normalized weight, days until departure / 30, overdue
+        self.state = np.zeros(shape + (4,), dtype=np.float32)
+
+        self.metrics = YardMetrics(config)
+        self.index = YardIndex()
+
+        # Ids whose placement may have become stale; consumed by the reoptimizer
+        self.dirty = set()
+        self.track_changes = True
+
+        # Writers hold the lock for each mutation; `version` counts mutations so readers can
+        # tell whether their snapshot is current
+        self.lock = threading.RLock()
+        self.version = 0
+        self._snapshot = None  # weak reference to the last published snapshot
+
+        # Optional mutation log (YardStore); records are written under the lock, in mutation order
+        self.journal = None
+
+    @property
+    def capacity(self):
+        return self.occupancy.size
+
     def add_container(self, container, position):
+        if position is None:
+            return False
         x, y, z = position
-        if self.grid[x][y][z] is None and self._check_weight_limit(x, y, z, container.weight):
-            self.grid[x][y][z] = container
-            self.containers[container.id] = container
-            return True
+        with self.lock:
+            # The duplicate check belongs under the lock, or two concurrent adds of one id could both pass it
+            if container.id in self.positions:
+                return False
+            if self.grid[x][y][z] is None and self._check_weight_limit(x, y, z, container.weight):
+                self._detach()
+                self.containers[container.id] = container
+                self._place(container, (x, y, z))
+                self.index.add(container)
+                if self.journal is not None:
+                    self.journal.record('add', container, (x, y, z))
+                return True
         return False
 
+    def load(self, containers, positions, columns=None):
+        # Bulk-fills an empty yard, e.g. from a persisted snapshot: arrays, rehandle index, metrics
+        # and secondary indexes are built once instead of once per container. Positions are trusted
+        # to be distinct, supported and within the weight limits, as they were when saved.
+        # `columns` holds per-container lists (see container_columns) when the caller already has
+        # them, which saves reading every attribute back from the containers.
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        columns = columns or container_columns(containers)
+        with self.lock:
+            if self.containers:
+                raise ValueError("Yard.load needs an empty yard")
+            if len(containers) != len(positions):
+                raise ValueError("Expected one position per container")
+            x, y, z = positions.T
+            flat = np.ravel_multi_index((x, y, z), self.occupancy.shape)
+            if len(flat) and np.bincount(flat).max() > 1:
+                raise ValueError("Two containers share a cell")
+            self._detach()
+            ids = columns['id']
+            cells = list(zip(*positions.T.tolist())) if len(positions) else []
+            self.containers.update(zip(ids, containers))
+            self.positions.update(zip(ids, cells))
+            grid = self.grid
+            for container, (i, j, k) in zip(containers, cells):
+                grid[i][j][k] = container
+            weights = np.array(columns['weight'], dtype=np.float64)
+            departures = np.array(columns['departure'], dtype=np.float64)  # None -> NaN
+            self.occupancy[x, y, z] = True
+            self.weights[x, y, z] = weights
+            self.departures[x, y, z] = departures
+            self.state[x, y, z, 0] = 1
+            self.state[x, y, z, 1] = weights / self.config.max_weight_per_stack
+            self.stack_weights = self.weights.sum(axis=2)
+            top = self.config.height - np.argmax(self.occupancy[..., ::-1], axis=2)
+            self.stack_heights = np.where(self.occupancy.any(axis=2), top, 0)
+            self.blocking, self.stack_min_departure = blocking_cells(self.departures, self.occupancy)
+            self.stack_blocking = self.blocking.sum(axis=2)
+            self.metrics.load(weights, positions, departures, self.stack_heights, self.stack_blocking.sum())
+            self.index.load(ids, columns['destination'], columns['departure'], columns['priority'], columns['is_refrigerated'])
+            self.version += 1
+
     def _check_weight_limit(self, x, y, z, container_weight):
-        stack_weight = sum(self.grid[x][y][i].weight for i in range(z) if self.grid[x][y][i] is not None)
+        stack_weight = self.weights[x, y, :z].sum()
         return stack_weight + container_weight <= self.config.max_weight_per_stack
 
+    def _place(self, container, position):
+        x, y, z = position
+        self.grid[x][y][z] = container
+        self.positions[container.id] = position
+        self.occupancy[x, y, z] = True
+        self.weights[x, y, z] = container.weight
+        self.stack_weights[x, y] += container.weight
+        old_height = self.stack_heights[x, y]
+        self.stack_heights[x, y] = max(old_height, z + 1)
+        self._sync_cell(container, position)
+        self._update_blocking(x, y)
+        self.metrics.add(container.weight, position, self._departure_at(position))
+        self.metrics.stack_height_changed(old_height, self.stack_heights[x, y])
+        self._mark_stack_dirty(x, y)
+        self.version += 1
+
+    def _sync_cell(self, container, position):
+        x, y, z = position
+        departure = to_timestamp(container.departure_date)
+        self.departures[x, y, z] = np.nan if departure is None else departure
+        self.state[x, y, z, 0] = 1
+        self.state[x, y, z, 1] = container.weight / self.config.max_weight_per_stack
+
+    def _update_blocking(self, x, y):
+        # O(height): recompute one stack's blocking containers after it changed. A plain loop,
+        # since NumPy call overhead dominates on a single stack; blocking_cells is the vectorized form.
+        earliest = np.inf
+        blocking = []
+        for occupied, departure in zip(self.occupancy[x, y].tolist(), self.departures[x, y].tolist()):
+            if not occupied:
+                blocking.append(False)
+                continue
+            departure = np.inf if departure != departure else departure  # NaN: unknown departure
+            blocking.append(earliest < departure)
+            earliest = min(earliest, departure)
+        old_count, new_count = int(self.stack_blocking[x, y]), sum(blocking)
+        self.blocking[x, y] = blocking
+        self.stack_blocking[x, y] = new_count
+        self.stack_min_departure[x, y] = earliest
+        self.metrics.stack_blocking_changed(old_count, new_count)
+
+    @property
+    def expected_rehandles(self):
+        # Yard-wide number of blocking containers, a lower bound on future rehandles
+        return self.metrics.expected_rehandles
+
+    def rehandles_if_placed(self, container, vacate=None):
+        # (L, W): 1 where putting `container` on top of the stack would make it block.
+        # `vacate` is a top cell scored as if its container had been lifted.
+        departure = to_timestamp(container.departure_date)
+        departure = np.inf if departure is None else departure
+        rehandles = (self.stack_min_departure < departure).astype(np.int64)
+        if vacate is not None:
+            x, y, z = vacate
+            rehandles[x, y] = np.fmin.reduce(self.departures[x, y, :z], initial=np.inf) < departure
+        return rehandles
+
+    def _departure_at(self, position):
+        departure = self.departures[position]
+        return None if np.isnan(departure) else float(departure)
+
+    def _clear(self, position):
+        x, y, z = position
+        container = self.grid[x][y][z]
+        self.grid[x][y][z] = None
+        del self.positions[container.id]
+        self.metrics.remove(self.weights[x, y, z], position, self._departure_at(position))
+        self.occupancy[x, y, z] = False
+        self.stack_weights[x, y] -= self.weights[x, y, z]
+        self.weights[x, y, z] = 0
+        self.departures[x, y, z] = np.nan
+        self.state[x, y, z] = 0
+        if self.stack_heights[x, y] == z + 1:
+            levels = np.flatnonzero(self.occupancy[x, y])
+            self.stack_heights[x, y] = levels[-1] + 1 if len(levels) else 0
+            self.metrics.stack_height_changed(z + 1, self.stack_heights[x, y])
+        self._update_blocking(x, y)
+        self.dirty.discard(container.id)
+        self._mark_stack_dirty(x, y)
+        self.version += 1
+        return container
+
+    def _mark_stack_dirty(self, x, y):
+        if self.track_changes:
+            self.dirty.update(container.id for container in self.grid[x][y] if container is not None)
+
+    def take_dirty(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+        return dirty
+
     def remove_container(self, container_id):
-        if container_id in self.containers:
+        with self.lock:
+            position = self.positions.get(container_id)
+            if position is None:
+                return False
+            self._detach()
+            container = self._clear(position)
+            del self.containers[container_id]
+            self.index.remove(container_id)
+            if self.journal is not None:
+                self.journal.record('remove', container)
+        return True
+
+    def refresh_container(self, container_id):
+        # Re-sync the arrays after a container's weight or dates were edited in place
+        with self.lock:
+            position = self.positions.get(container_id)
+            if position is None:
+                return False
+            self._detach()
             container = self.containers[container_id]
-            for x in range(self.config.length):
-                for y in range(self.config.width):
-                    for z in range(self.config.height):
-                        if self.grid[x][y][z] == container:
-                            self.grid[x][y][z] = None
-                            del self.containers[container_id]
-                            return True
-        return False
+            x, y, z = position
+            old_weight, old_departure = self.weights[x, y, z], self._departure_at(position)
+            self.stack_weights[x, y] += container.weight - old_weight
+            self.weights[x, y, z] = container.weight
+            self._sync_cell(container, position)
+            self._update_blocking(x, y)
+            self.index.update(container)
+            self.metrics.update_container(old_weight, container.weight, old_departure, self._departure_at(position))
+            self._mark_stack_dirty(x, y)
+            self.version += 1
+            if self.journal is not None:
+                self.journal.record('update', container)
+        return True
+
+    def _published_snapshot(self):
+        return self._snapshot() if self._snapshot is not None else None
+
+    def _detach(self):
+        # Copy-on-write, called by every mutation under the lock: a snapshot shares the live
+        # containers, positions and index, so they are copied first, but only while a reader
+        # still holds that snapshot. Mutations with no snapshot outstanding copy nothing.
+        snapshot = self._published_snapshot()
+        if snapshot is not None and snapshot.containers is self.containers:
+            self.containers, self.positions, self.index = dict(self.containers), dict(self.positions), self.index.copy()
+
+    def snapshot(self):
+        # Returns the snapshot for the current version; building one is O(L * W), the O(n)
+        # copies are left to _detach. A reader never waits for a writer: if the lock is taken,
+        # a snapshot still held elsewhere is returned, consistent but possibly one mutation behind.
+        snapshot = self._published_snapshot()
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+        if not self.lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = YardSnapshot(self.version, self.containers, self.positions,
+                                    self.stack_heights.copy(), self.metrics.copy(), self.index)
+            self._snapshot = weakref.ref(snapshot)
+        finally:
+            self.lock.release()
+        return snapshot
+
+    def metrics_snapshot(self):
+        # Copy of the running aggregates alone, for readers that need no per-container data
+        with self.lock:
+            return self.metrics.copy()
+
+    def refresh_state(self, now=None):
+        # Recompute the time-dependent state channels from a single clock reading
+        now = to_timestamp(now or datetime.now())
+        with self.lock:
+            remaining = self.departures - now
+            # fmax maps the NaN of empty cells to 0, and NaN < 0 is False
+            self.state[..., 2] = np.fmax(np.floor(remaining / SECONDS_PER_DAY), 0) / 30
+            self.state[..., 3] = remaining < 0
+        return self.state
 
     def get_container_position(self, container_id):
-        for x in range(self.config.length):
-            for y in range(self.config.width):
-                for z in range(self.config.height):
-                    if self.grid[x][y][z] and self.grid[x][y][z].id == container_id:
-                        return (x, y, z)
-        return None
+        return self.positions.get(container_id)
+
+    def get_container_at(self, position):
+        x, y, z = position
+        return self.grid[x][y][z]
 
     def move_container(self, container_id, new_position):
-        container = self.containers.get(container_id)
-        if not container:
-            return False
+        with self.lock:
+            container = self.containers.get(container_id)
+            if not container:
+                return False
 
-        current_position = self.get_container_position(container_id)
-        if not current_position:
-            return False
+            current_position = self.positions.get(container_id)
+            if not current_position:
+                return False
 
-        x, y, z = new_position
-        if self.grid[x][y][z] is not None:
-            return False
+            x, y, z = new_position
+            if self.grid[x][y][z] is not None:
+                return False
 
-        self.grid[current_position[0]][current_position[1]][current_position[2]] = None
-        self.grid[x][y][z] = container
+            self._detach()
+            self._clear(current_position)
+            self._place(container, (x, y, z))
+            if self.journal is not None:
+                self.journal.record('move', container, (x, y, z))
         return True
 
+    def containers_departing_between(self, start, end):
+        # Ids of containers whose departure timestamp lies in (start, end], from the departure index
+        with self.lock:
+            return self.index.departing_between(start, end)
+
+    def free_slots(self):
+        # (n, 3) array of empty (x, y, z) cells
+        return np.argwhere(~self.occupancy)
+
+    def weight_below(self):
+        # Weight resting below every cell of its stack
+        return np.cumsum(self.weights, axis=2) - self.weights
+
+    def weight_limit_mask(self, container_weight):
+        return self.weight_below() + container_weight <= self.config.max_weight_per_stack
+
+    def support_mask(self):
+        # Ground level, or a container directly below
+        supported = np.ones_like(self.occupancy)
+        supported[:, :, 1:] = self.occupancy[:, :, :-1]
+        return supported
+
+    def feasible_mask(self, container_weight, vacate=None):
+        # Cells where add_container would succeed and the container would not float; `vacate`
+        # as in rehandles_if_placed
+        mask = ~self.occupancy & self.support_mask() & self.weight_limit_mask(container_weight)
+        if vacate is not None:
+            x, y, z = vacate
+            mask[x, y, z] = self._check_weight_limit(x, y, z, container_weight)
+            mask[x, y, z + 1:] = False
+        return mask
+
+    def utilization(self):
+        return len(self.positions) / self.capacity
+
     def calculate_move_time(self, start_pos, end_pos):
         x1, y1, z1 = start_pos
         x2, y2, z2 = end_pos
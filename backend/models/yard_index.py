@@ -0,0 +1,101 @@
+from bisect import bisect_left, bisect_right, insort
+from .container import to_timestamp
+
+LAST_ID = chr(0x10FFFF)  # sorts after every container id, so (t, LAST_ID) bisects past all entries at t
+
+
+class YardIndex:
+    # Secondary indexes over the containers in the yard, maintained by Yard on add, remove and
+    # refresh. Departures are a sorted list of (timestamp, id), so time range queries are a
+    # bisection plus the matches: O(log n + k).
+    def __init__(self):
+        self.by_destination = {}
+        self.by_priority = {}
+        self.refrigerated = set()
+        self.departures = []
+        self.entries = {}  # id -> indexed values, to find the entries again on removal
+
+    def add(self, container):
+        departure = self._add_entry(container)
+        if departure is not None:
+            insort(self.departures, (departure, container.id))
+
+    def load(self, ids, destinations, departures, priorities, refrigerated):
+        # Bulk add from per-container columns: one sort of the departures instead of an insort
+        # per container, and no attribute reads on the containers themselves
+        priorities = [priority or 0 for priority in priorities]
+        refrigerated = [bool(value) for value in refrigerated]
+        self.entries.update(zip(ids, zip(destinations, departures, priorities, refrigerated)))
+        for container_id, destination, priority, is_refrigerated in zip(ids, destinations, priorities, refrigerated):
+            self.by_destination.setdefault(destination, set()).add(container_id)
+            self.by_priority.setdefault(priority, set()).add(container_id)
+            if is_refrigerated:
+                self.refrigerated.add(container_id)
+        self.departures = sorted(self.departures + [(departure, container_id) for departure, container_id
+                                                    in zip(departures, ids) if departure is not None])
+
+    def _add_entry(self, container):
+        departure = to_timestamp(container.departure_date)
+        entry = (container.destination, departure, container.priority or 0, bool(container.is_refrigerated))
+        self.entries[container.id] = entry
+        destination, departure, priority, refrigerated = entry
+        self.by_destination.setdefault(destination, set()).add(container.id)
+        self.by_priority.setdefault(priority, set()).add(container.id)
+        if refrigerated:
+            self.refrigerated.add(container.id)
+        return departure
+
+    def remove(self, container_id):
+        entry = self.entries.pop(container_id, None)
+        if entry is None:
+            return
+        destination, departure, priority, refrigerated = entry
+        self._discard(self.by_destination, destination, container_id)
+        self._discard(self.by_priority, priority, container_id)
+        self.refrigerated.discard(container_id)
+        if departure is not None:
+            i = bisect_left(self.departures, (departure, container_id))
+            if i < len(self.departures) and self.departures[i] == (departure, container_id):
+                del self.departures[i]
+
+    def update(self, container):
+        self.remove(container.id)
+        self.add(container)
+
+    @staticmethod
+    def _discard(index, key, container_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(container_id)
+            if not ids:
+                del index[key]
+
+    def with_destination(self, destination):
+        return self.by_destination.get(destination, set())
+
+    def with_priority(self, priority=None, min_priority=None):
+        if priority is not None:
+            return self.by_priority.get(priority, set())
+        return set().union(*(ids for level, ids in self.by_priority.items() if level >= min_priority))
+
+    def departing_between(self, start, end, include_end=True):
+        # Ids whose departure timestamp lies in (start, end], or (start, end) without `include_end`
+        lo = bisect_right(self.departures, (start, LAST_ID)) if start is not None else 0
+        if end is None:
+            hi = len(self.departures)
+        else:
+            hi = bisect_right(self.departures, (end, LAST_ID)) if include_end else bisect_left(self.departures, (end, ''))
+        return [container_id for _, container_id in self.departures[lo:hi]]
+
+    def overdue(self, now):
+        # Ids whose departure is strictly before `now`, matching Container.is_overdue
+        return [container_id for _, container_id in self.departures[:bisect_left(self.departures, (now, ''))]]
+
+    def copy(self):
+        index = YardIndex()
+        index.by_destination = {key: set(ids) for key, ids in self.by_destination.items()}
+        index.by_priority = {key: set(ids) for key, ids in self.by_priority.items()}
+        index.refrigerated = set(self.refrigerated)
+        index.departures = list(self.departures)
+        index.entries = dict(self.entries)
+        return index
@@ -0,0 +1,116 @@
+import copy
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+
+class YardMetrics:
+    # Running aggregates kept up to date by Yard mutations, so reading them never scans the yard
+    def __init__(self, config):
+        self.config = config
+        self.total_containers = 0
+        self.total_weight = 0.0
+        self.total_moves = 0  # sum of |x| + |y| + |z| over all placed containers
+        self.optimized_moves = 0
+        self.stack_count = config.length * config.width
+        self.height_counts = np.zeros(config.height + 1, dtype=np.int64)  # number of stacks per height
+        self.height_counts[0] = self.stack_count
+        self.stack_height_sum = 0
+        self.expected_rehandles = 0  # containers sitting above one that leaves earlier
+        # Departure timestamp -> number of containers; time-dependent metrics only touch distinct dates
+        self.departures = {}
+        self._departure_arrays = None
+
+    def add(self, weight, position, departure):
+        self.total_containers += 1
+        self.total_weight += weight
+        self.total_moves += sum(abs(v) for v in position)
+        self._add_departure(departure, 1)
+
+    def remove(self, weight, position, departure):
+        self.total_containers -= 1
+        self.total_weight -= weight
+        self.total_moves -= sum(abs(v) for v in position)
+        self._add_departure(departure, -1)
+
+    def update_container(self, old_weight, new_weight, old_departure, new_departure):
+        self.total_weight += new_weight - old_weight
+        if old_departure != new_departure:
+            self._add_departure(old_departure, -1)
+            self._add_departure(new_departure, 1)
+
+    def load(self, weights, positions, departures, stack_heights, expected_rehandles):
+        # Aggregates of a bulk-loaded yard, computed from arrays instead of one container at a time
+        self.total_containers = len(weights)
+        self.total_weight = float(weights.sum())
+        self.total_moves = int(np.abs(positions).sum())
+        self.height_counts = np.bincount(stack_heights.ravel(), minlength=self.config.height + 1)
+        self.stack_height_sum = int(stack_heights.sum())
+        self.expected_rehandles = int(expected_rehandles)
+        timestamps, counts = np.unique(departures[~np.isnan(departures)], return_counts=True)
+        self.departures = dict(zip(timestamps.tolist(), counts.tolist()))
+        self._departure_arrays = None
+
+    def stack_height_changed(self, old_height, new_height):
+        if old_height != new_height:
+            self.height_counts[old_height] -= 1
+            self.height_counts[new_height] += 1
+            self.stack_height_sum += new_height - old_height
+
+    def copy(self):
+        metrics = copy.copy(self)
+        metrics.height_counts = self.height_counts.copy()
+        metrics.departures = dict(self.departures)
+        return metrics
+
+    def stack_blocking_changed(self, old_count, new_count):
+        self.expected_rehandles += new_count - old_count
+
+    def record_optimized_moves(self, count):
+        self.optimized_moves += count
+
+    def _add_departure(self, departure, delta):
+        if departure is None:
+            return
+        count = self.departures.get(departure, 0) + delta
+        if count:
+            self.departures[departure] = count
+        else:
+            del self.departures[departure]
+        self._departure_arrays = None
+
+    def _departure_view(self):
+        if self._departure_arrays is None:
+            self._departure_arrays = (
+                np.fromiter(self.departures.keys(), dtype=np.float64, count=len(self.departures)),
+                np.fromiter(self.departures.values(), dtype=np.int64, count=len(self.departures))
+            )
+        return self._departure_arrays
+
+    def time_metrics(self, now):
+        timestamps, counts = self._departure_view()
+        remaining = timestamps - now
+        overdue = int(counts[remaining < 0].sum())
+        total = counts.sum()
+        if not total:
+            return overdue, None
+        days = np.maximum(np.floor(remaining / SECONDS_PER_DAY), 0)
+        return overdue, float((days * counts).sum() / total)
+
+    def snapshot(self, now):
+        overdue, avg_days = self.time_metrics(now)
+        energy_consumption = self.total_moves * self.config.crane_energy_consumption
+        return {
+            "total_containers": self.total_containers,
+            "total_weight": self.total_weight,
+            "overdue_containers": overdue,
+            "avg_days_until_departure": avg_days,
+            "total_moves": self.total_moves,
+            "optimized_moves": self.optimized_moves,
+            "energy_consumption": energy_consumption,
+            "carbon_emissions": energy_consumption * self.config.carbon_emission_factor,
+            "yard_utilization": self.total_containers / (self.stack_count * self.config.height),
+            "avg_stack_height": self.stack_height_sum / self.stack_count,
+            "max_stack_height": int(np.flatnonzero(self.height_counts)[-1]),
+            "expected_rehandles": self.expected_rehandles
+        }
@@ -0,0 +1,268 @@
+import gc
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from datetime import timedelta
+from .container import StoredContainer, EPOCH, to_timestamp
+from ..utils.logger import app_logger
+
+POINTER_FILE = 'snapshot.json'
+DATE_FIELDS = ('arrival_date', 'departure_date', 'last_moved')
+
+
+def encode_row(container):
+    row = container.to_row()
+    for field in DATE_FIELDS:
+        row[field] = to_timestamp(row[field])
+    return row
+
+
+def decode_row(row):
+    for field in DATE_FIELDS:
+        if row[field] is not None:
+            row[field] = EPOCH + timedelta(seconds=row[field])
+    return row
+
+
+def encode_categories(values):
+    # Small-vocabulary strings (destinations, content types) as int codes plus the vocabulary
+    vocabulary = {}
+    codes = np.fromiter((vocabulary.setdefault(value, len(vocabulary)) for value in values), dtype=np.int32, count=len(values))
+    return codes, list(vocabulary)
+
+
+class YardStore:
+    # Persists the yard layout so a restart does not have to place every container again.
+    # A snapshot is a directory of .npy arrays (ids, positions, weights, dates, ...) named by the
+    # journal sequence it covers; snapshot.json points at the current one and is replaced
+    # atomically. Every add, move, remove and update after it is appended to a JSON-lines
+    # journal. Loading maps the snapshot, bulk-loads the yard and replays the journal tail.
+    # Compaction writes a new snapshot and drops the journal files it covers.
+    def __init__(self, directory, compact_every=10000, fsync=False):
+        self.directory = directory
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.pointer_path = os.path.join(directory, POINTER_FILE)
+        self.yard = None
+        self.sequence = 0  # sequence number of the last journaled mutation
+        self.snapshot_sequence = 0
+        self.journal_file = None
+        self.compacting = threading.Lock()
+
+    def latest(self):
+        try:
+            with open(self.pointer_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def attach(self, yard):
+        # Restores `yard` from disk, then journals its mutations from here on
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        track_changes, yard.track_changes = yard.track_changes, False
+        try:
+            loaded = self._load_snapshot(yard)
+            replayed = self._replay(yard)
+        finally:
+            yard.track_changes = track_changes
+        self.yard = yard
+        self._open_journal()
+        yard.journal = self
+        stats = {"containers": len(yard.containers), "snapshot_containers": loaded, "replayed": replayed,
+                 "sequence": self.sequence, "seconds": round(time.perf_counter() - started, 4)}
+        app_logger.info(f"Yard restored from {self.directory}: {stats}")
+        if replayed >= self.compact_every:
+            self.compact_in_background()
+        return stats
+
+    def _load_snapshot(self, yard):
+        latest = self.latest()
+        if latest is None:
+            return 0
+        path = os.path.join(self.directory, latest['directory'])
+        arrays = {name[:-len('.npy')]: np.load(os.path.join(path, name), mmap_mode='r')
+                  for name in os.listdir(path) if name.endswith('.npy')}
+        # Categories are decoded by indexing an object array of the vocabulary, so equal values
+        # share one string object
+        destinations = np.array(latest['destinations'], dtype=object)[arrays['destinations']]
+        content_types = np.array(latest['content_types'], dtype=object)[arrays['content_types']]
+        columns = {
+            "id": arrays['ids'].tolist(),
+            "weight": arrays['weights'].tolist(),
+            "destination": destinations.tolist(),
+            "content_type": content_types.tolist(),
+            "is_refrigerated": arrays['refrigerated'].tolist(),
+            "priority": arrays['priorities'].tolist()
+        }
+        for field in DATE_FIELDS:
+            columns[field] = arrays[field].tolist()  # datetime64[us] -> datetime, NaT -> None
+        names = list(columns)
+        # Yard.load takes the numeric columns as arrays, straight from the mapped files
+        departures = arrays['departure_date']
+        known = ~np.isnat(departures)
+        seconds = np.full(len(departures), np.nan)
+        seconds[known] = (departures[known] - np.datetime64(EPOCH, 'us')).astype(np.int64) / 1e6
+        departure_column = seconds.astype(object)
+        departure_column[~known] = None
+        # Creating ~10^5 objects in a row triggers GC passes that cost more than the objects themselves
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            containers = StoredContainer.from_rows(zip(names, values) for values in zip(*columns.values()))
+            columns["weight"] = np.asarray(arrays['weights'])
+            columns["departure"] = departure_column.tolist()
+            yard.load(containers, np.asarray(arrays['positions']), columns)
+        finally:
+            # The restored yard lives as long as the process: moving it to the permanent
+            # generation spares the collector a full traversal of it right after re-enabling
+            gc.freeze()
+            if gc_enabled:
+                gc.enable()
+        self.sequence = self.snapshot_sequence = latest['sequence']
+        return len(containers)
+
+    def _journal_files(self):
+        # (start sequence, path); a file holds the entries after its start sequence
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith('journal-') and name.endswith('.jsonl'):
+                files.append((int(name[len('journal-'):-len('.jsonl')]), os.path.join(self.directory, name)))
+        return sorted(files)
+
+    def _replay(self, yard):
+        replayed = 0
+        for _, path in self._journal_files():
+            with open(path) as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn write from a crash; the next append starts on a fresh line
+                        app_logger.warning(f"Skipping unreadable journal line {path}:{line_number}")
+                        continue
+                    if entry['seq'] <= self.sequence:
+                        continue
+                    self._apply(yard, entry)
+                    self.sequence = entry['seq']
+                    replayed += 1
+        return replayed
+
+    def _apply(self, yard, entry):
+        op = entry['op']
+        if op == 'add':
+            container, = StoredContainer.from_rows([decode_row(entry['container'])])
+            yard.add_container(container, tuple(entry['position']))
+        elif op == 'move':
+            yard.move_container(entry['id'], tuple(entry['position']))
+        elif op == 'remove':
+            yard.remove_container(entry['id'])
+        elif op == 'update':
+            container = yard.containers.get(entry['id'])
+            if container is not None:
+                for field, value in decode_row(entry['container']).items():
+                    setattr(container, field, value)
+                yard.refresh_container(entry['id'])
+
+    def _open_journal(self):
+        path = os.path.join(self.directory, f'journal-{self.sequence:012d}.jsonl')
+        if self.journal_file is not None:
+            self.journal_file.close()
+        self.journal_file = open(path, 'a')
+        if self.journal_file.tell() and not self._ends_with_newline(path):
+            self.journal_file.write('\n')
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def record(self, op, container, position=None):
+        # Called by Yard while it holds its lock
+        self.sequence += 1
+        entry = {"seq": self.sequence, "op": op, "id": container.id}
+        if position is not None:
+            entry["position"] = [int(v) for v in position]
+        if op in ('add', 'update'):
+            entry["container"] = encode_row(container)
+        self.journal_file.write(json.dumps(entry) + '\n')
+        self.journal_file.flush()
+        if self.fsync:
+            os.fsync(self.journal_file.fileno())
+        if self.sequence - self.snapshot_sequence >= self.compact_every:
+            self.compact_in_background()
+
+    def compact_in_background(self):
+        if not self.compacting.locked():
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        # Writes a snapshot of the current layout and drops the journal it replaces. Only the
+        # capture runs under the yard lock; mutations after it go to a new journal file, and an
+        # in-place update that races the array build is replayed on top again on load.
+        if not self.compacting.acquire(blocking=False):
+            return None
+        try:
+            with self.yard.lock:
+                if self.sequence == self.snapshot_sequence and self.latest() is not None:
+                    return self.sequence  # the current snapshot already covers everything
+                containers = list(self.yard.containers.values())
+                positions = [self.yard.positions[container.id] for container in containers]
+                sequence = self.sequence
+                self._open_journal()
+            self._write_snapshot(containers, positions, sequence)
+            self.snapshot_sequence = sequence
+            for start, path in self._journal_files():
+                if start < sequence:
+                    os.remove(path)
+            app_logger.info(f"Yard snapshot written: {len(containers)} containers at sequence {sequence}")
+            return sequence
+        finally:
+            self.compacting.release()
+
+    def _write_snapshot(self, containers, positions, sequence):
+        # Written under a temporary name and renamed into place, so the directory snapshot.json
+        # points to is never partially written; a leftover of the same name is never the current one
+        name = f'snapshot-{sequence:012d}'
+        path = os.path.join(self.directory, name)
+        temporary_directory = f'{path}.tmp'
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        os.makedirs(temporary_directory)
+        destinations, destination_vocabulary = encode_categories([container.destination for container in containers])
+        content_types, content_type_vocabulary = encode_categories([container.content_type for container in containers])
+        arrays = {
+            "ids": np.array([container.id for container in containers], dtype=str),
+            "positions": np.array(positions, dtype=np.int32).reshape(-1, 3),
+            "weights": np.array([container.weight for container in containers], dtype=np.float64),
+            "priorities": np.array([container.priority or 0 for container in containers], dtype=np.int32),
+            "refrigerated": np.array([bool(container.is_refrigerated) for container in containers], dtype=bool),
+            "destinations": destinations,
+            "content_types": content_types
+        }
+        for field in DATE_FIELDS:
+            arrays[field] = np.array([getattr(container, field) for container in containers], dtype='datetime64[us]')
+        for array_name, array in arrays.items():
+            np.save(os.path.join(temporary_directory, f'{array_name}.npy'), array)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(temporary_directory, path)
+        entry = {"sequence": sequence, "directory": name, "count": len(containers), "written_at": time.time(),
+                 "destinations": destination_vocabulary, "content_types": content_type_vocabulary}
+        temporary_path = f'{self.pointer_path}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temporary_path, self.pointer_path)
+        for old in os.listdir(self.directory):
+            if old.startswith('snapshot-') and old != name:
+                shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+    def close(self):
+        if self.yard is not None:
+            self.yard.journal = None
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
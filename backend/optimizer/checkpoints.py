@@ -0,0 +1,51 @@
+import json
+import os
+import time
+from .numpy_inference import NumpyPolicy
+
+POINTER_FILE = 'latest.json'
+
+
+class CheckpointStore:
+    # Versioned policy checkpoints shared between the training worker and the serving process.
+    # Weights are written to policy-<version>.npz first, then latest.json is replaced to point
+    # at them, so a reader only ever sees complete checkpoints.
+    def __init__(self, directory, keep=3):
+        self.directory = directory
+        self.keep = keep
+        self.pointer_path = os.path.join(directory, POINTER_FILE)
+
+    def latest(self):
+        try:
+            with open(self.pointer_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, weights, progress=None):
+        os.makedirs(self.directory, exist_ok=True)
+        latest = self.latest()
+        version = latest['version'] + 1 if latest else 1
+        file_name = f'policy-{version:06d}.npz'
+        NumpyPolicy.save_weights(weights, os.path.join(self.directory, file_name))
+        entry = {"version": version, "file": file_name, "published_at": time.time(), "progress": progress or {}}
+        temporary_path = f'{self.pointer_path}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temporary_path, self.pointer_path)
+        self._prune(version)
+        return version
+
+    def load(self, entry, quantize=False):
+        return NumpyPolicy.load(os.path.join(self.directory, entry['file']), quantize=quantize)
+
+    def _prune(self, version):
+        # Older files are kept for a while so a reader that just read the pointer can still open them
+        for name in os.listdir(self.directory):
+            if name.startswith('policy-') and name.endswith('.npz'):
+                try:
+                    old_version = int(name[len('policy-'):-len('.npz')])
+                except ValueError:
+                    continue
+                if old_version <= version - self.keep:
+                    os.remove(os.path.join(self.directory, name))
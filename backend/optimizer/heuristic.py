@@ -0,0 +1,48 @@
+import numpy as np
+
+LEVEL_PENALTY = 10     # per level above ground
+SUPPORT_BONUS = 5      # for resting on a container
+OVERDUE_PENALTY = 3    # per overdue container in the surrounding 3x3x3 block
+REHANDLE_PENALTY = 15  # for burying a container that leaves earlier
+
+
+def neighbour_counts(values):
+    # Sum over each cell's 3x3x3 neighbourhood (zero padded) as three separable box sums
+    # over the last three axes; equivalent to a 3D convolution with a ones kernel
+    counts = values
+    for axis in (-3, -2, -1):
+        padding = [(0, 0)] * counts.ndim
+        padding[axis] = (1, 1)
+        padded = np.pad(counts, padding)
+        size = counts.shape[axis]
+        counts = (np.take(padded, range(0, size), axis=axis) +
+                  np.take(padded, range(1, size + 1), axis=axis) +
+                  np.take(padded, range(2, size + 2), axis=axis))
+    return counts
+
+
+def position_scores(state, rehandles=None):
+    # Heuristic placement score for every cell; `state` is (..., L, W, H, 4) and higher is better.
+    # `rehandles` (..., L, W) optionally marks stacks where the container would block another.
+    occupied = state[..., 0] == 1
+    overdue = (state[..., 3] == 1).astype(np.float32)
+    height = state.shape[-2]
+    scores = np.broadcast_to(-LEVEL_PENALTY * np.arange(height, dtype=np.float32), occupied.shape).copy()
+    scores[..., 1:] += SUPPORT_BONUS * occupied[..., :-1]
+    scores -= OVERDUE_PENALTY * neighbour_counts(overdue)
+    if rehandles is not None:
+        scores -= REHANDLE_PENALTY * np.asarray(rehandles)[..., None]
+    return scores
+
+
+def best_actions(states, shape, mask=None):
+    # Flat index of the best empty (and, if given, masked-in) cell per state; -1 when none is available
+    states = np.asarray(states).reshape((-1,) + tuple(shape) + (4,))
+    scores = position_scores(states)
+    available = states[..., 0] != 1
+    if mask is not None:
+        available &= mask
+    scores = np.where(available, scores, -np.inf).reshape(len(states), -1)
+    actions = np.argmax(scores, axis=1)
+    actions[~np.isfinite(scores[np.arange(len(states)), actions])] = -1
+    return actions
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+from backend.utils.logger import optimization_logger
+
+
+class InferenceScheduler:
+    # Collects concurrent placement requests for up to `window_ms` and places them together:
+    # one forward pass per micro-batch, slots assigned one after another so no two requests
+    # can be given the same cell
+    def __init__(self, optimizer, window_ms=2, max_batch_size=64):
+        self.optimizer = optimizer
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.placements = 0
+        self.largest_batch = 0
+        self.latencies = deque(maxlen=1000)  # seconds from submit to result, most recent requests
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def submit(self, container):
+        self.start()
+        future = Future()
+        self.queue.put((container, future, time.perf_counter()))
+        return future
+
+    def place(self, container, timeout=None):
+        # A request that times out leaves nothing behind: a queued placement is cancelled, and
+        # one already taken into a batch is undone as soon as the batch has placed it
+        future = self.submit(container)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if not future.cancel():
+                future.add_done_callback(lambda done: self._undo(container, done))
+            raise
+
+    def _undo(self, container, future):
+        if future.exception() is None and future.result()['placed']:
+            self.optimizer.yard.remove_container(container.id)
+            optimization_logger.info(f"Placement of {container.id} undone after its request timed out")
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Requests cancelled while queued are dropped here; the rest can no longer be cancelled
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.optimizer.place_batch([container for container, _, _ in batch], chunk_size=len(batch))
+            except Exception as e:
+                optimization_logger.error(f"Micro-batch placement failed: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            for (_, future, submitted), result in zip(batch, results):
+                self.latencies.append(finished - submitted)
+                future.set_result(result)
+            self.batches += 1
+            self.placements += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def get_stats(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "queue_depth": self.queue.qsize(),
+            "batches": self.batches,
+            "placements": self.placements,
+            "avg_batch_size": self.placements / self.batches if self.batches else 0,
+            "max_batch_size": self.largest_batch,
+            "window_ms": self.window * 1000,
+            "p50_latency_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_latency_ms": float(np.percentile(latencies, 99)) if len(latencies) else None
+        }
@@ -0,0 +1,163 @@
+import numpy as np
+
+GATE = (0, 0, 0)  # where containers enter and leave the yard and the crane parks between passes
+
+
+class MovePlan:
+    # Ordered crane moves with their estimated cost. `moves` are (container_id, from, to) tuples;
+    # the loaded part of each move is fixed, the order only changes the empty travel in between.
+    def __init__(self, moves, travel_times, move_times, energies, unordered_time, unordered_energy,
+                 unresolved_dependencies=0):
+        self.moves = moves
+        self.travel_times = travel_times
+        self.move_times = move_times
+        self.energies = energies
+        self.unordered_time = unordered_time
+        self.unordered_energy = unordered_energy
+        self.unresolved_dependencies = unresolved_dependencies
+
+    @property
+    def total_time(self):
+        return float(sum(self.travel_times) + sum(self.move_times))
+
+    @property
+    def total_energy(self):
+        return float(sum(self.energies))
+
+    def to_dict(self):
+        return {
+            "moves": [
+                {
+                    "container_id": container_id,
+                    "from": dict(zip(('x', 'y', 'z'), map(int, source))),
+                    "to": dict(zip(('x', 'y', 'z'), map(int, destination))),
+                    "travel_time": float(travel_time),
+                    "move_time": float(move_time),
+                    "energy": float(energy)
+                }
+                for (container_id, source, destination), travel_time, move_time, energy
+                in zip(self.moves, self.travel_times, self.move_times, self.energies)
+            ],
+            "estimated_time": self.total_time,
+            "estimated_energy": self.total_energy,
+            "unordered_time": self.unordered_time,
+            "unordered_energy": self.unordered_energy,
+            "unresolved_dependencies": self.unresolved_dependencies
+        }
+
+
+def precedence(sources, destinations):
+    # before[i, j]: move i has to happen before move j for both to be physically possible
+    same_source_stack = (sources[:, None, :2] == sources[None, :, :2]).all(axis=2)
+    source_below_destination = (sources[:, None, :2] == destinations[None, :, :2]).all(axis=2)
+    same_destination_stack = (destinations[:, None, :2] == destinations[None, :, :2]).all(axis=2)
+    before = (
+        # Leaving the same stack: top first
+        (same_source_stack & (sources[:, None, 2] > sources[None, :, 2])) |
+        # A container must leave before another is put on top of it or into its cell
+        (source_below_destination & (sources[:, None, 2] <= destinations[None, :, 2])) |
+        # Filling the same stack: bottom first
+        (same_destination_stack & (destinations[:, None, 2] < destinations[None, :, 2]))
+    )
+    np.fill_diagonal(before, False)
+    return before
+
+
+def nearest_neighbour_order(travel, start_travel, before):
+    # Greedy tour over moves whose predecessors are done; falls back to the original order if the
+    # dependencies contain a cycle (the reoptimizer does not model every physical constraint)
+    count = len(start_travel)
+    pending = before.sum(axis=0)
+    done = np.zeros(count, dtype=bool)
+    order, unresolved = [], 0
+    costs = start_travel
+    for _ in range(count):
+        available = ~done & (pending == 0)
+        if not available.any():
+            unresolved += 1
+            available = ~done
+            choice = int(np.flatnonzero(available)[0])
+        else:
+            choice = int(np.argmin(np.where(available, costs, np.inf)))
+        order.append(choice)
+        done[choice] = True
+        pending -= before[choice]
+        costs = travel[choice]
+    return order, unresolved
+
+
+def two_opt(order, travel, start_travel, before, max_passes=50):
+    # Reverses path segments while that shortens the empty travel and keeps every dependency.
+    # Reversing positions i..j swaps the two boundary edges and flips the edges inside, whose
+    # cost change comes from prefix sums, so every candidate is scored in O(1).
+    order = np.asarray(order)
+    count = len(order)
+    if count < 3:
+        return order.tolist()
+    dependent = before | before.T
+    for _ in range(max_passes):
+        forward = travel[order[:-1], order[1:]]
+        backward = travel[order[1:], order[:-1]]
+        flip = np.concatenate([[0], np.cumsum(backward - forward)])  # flip[j] - flip[i]: inner edges i..j
+        i, j = np.triu_indices(count, k=1)
+        entry_old = np.where(i > 0, travel[order[np.maximum(i - 1, 0)], order[i]], start_travel[order[i]])
+        entry_new = np.where(i > 0, travel[order[np.maximum(i - 1, 0)], order[j]], start_travel[order[j]])
+        has_next = j < count - 1
+        exit_old = np.where(has_next, travel[order[j], order[np.minimum(j + 1, count - 1)]], 0)
+        exit_new = np.where(has_next, travel[order[i], order[np.minimum(j + 1, count - 1)]], 0)
+        delta = entry_new - entry_old + exit_new - exit_old + flip[j] - flip[i]
+
+        # A segment may only be reversed if no two of its moves depend on each other
+        blocked = np.zeros((count, count), dtype=bool)
+        positions = dependent[order][:, order]
+        for end in range(1, count):
+            suffix = np.logical_or.accumulate(positions[:end, end][::-1])[::-1]
+            blocked[:end, end] = blocked[:end, end - 1] | suffix
+        delta = np.where(blocked[i, j], np.inf, delta)
+
+        best = int(np.argmin(delta))
+        if delta[best] >= -1e-9:
+            break
+        start, end = i[best], j[best]
+        order[start:end + 1] = order[start:end + 1][::-1].copy()
+    return order.tolist()
+
+
+def sequence_costs(yard, sources, destinations, order, start=GATE):
+    # Empty travel, loaded move time and energy of every move when executed in `order`
+    order = np.asarray(order)
+    positions = np.vstack([np.array(start)[None, :], destinations[order[:-1]]])
+    crane, source, destination = positions.T, sources[order].T, destinations[order].T
+    travel_times = yard.calculate_move_time(tuple(crane), tuple(source))
+    move_times = yard.calculate_move_time(tuple(source), tuple(destination))
+    energies = yard.calculate_move_energy(tuple(crane), tuple(source)) + yard.calculate_move_energy(tuple(source), tuple(destination))
+    return travel_times, move_times, energies
+
+
+def plan_moves(yard, moves, start=GATE):
+    # Orders reoptimization moves to minimize crane travel between them. Only a cost matrix is
+    # built; the yard is not touched, so no move has to be applied and undone to score an order.
+    if not moves:
+        return MovePlan([], [], [], [], 0.0, 0.0)
+    sources = np.array([source for _, source, _ in moves], dtype=np.int64)
+    destinations = np.array([destination for _, _, destination in moves], dtype=np.int64)
+    # travel[i, j]: empty crane run from the end of move i to the start of move j
+    travel = yard.calculate_move_time(tuple(v[:, None] for v in destinations.T), tuple(v[None, :] for v in sources.T))
+    start_travel = yard.calculate_move_time(tuple(np.full(len(moves), v) for v in start), tuple(sources.T))
+
+    before = precedence(sources, destinations)
+    order, unresolved = nearest_neighbour_order(travel, start_travel, before)
+    if not unresolved:
+        order = two_opt(order, travel, start_travel, before)
+
+    travel_times, move_times, energies = sequence_costs(yard, sources, destinations, order, start)
+    original = sequence_costs(yard, sources, destinations, np.arange(len(moves)), start)
+    return MovePlan(
+        [moves[k] for k in order],
+        travel_times.tolist(),
+        move_times.tolist(),
+        energies.tolist(),
+        float(original[0].sum() + original[1].sum()),
+        float(original[2].sum()),
+        unresolved
+    )
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+
+
+class NumpyPolicy:
+    # Forward pass of the Dense/ReLU placement network in plain NumPy, so serving does not need TensorFlow.
+    # With quantize=True the kernels are stored as int8 with one float32 scale per output unit.
+    def __init__(self, weights, quantize=False):
+        self.quantize = quantize
+        self.layers = []
+        for kernel, bias in zip(weights[0::2], weights[1::2]):
+            kernel = np.asarray(kernel, dtype=np.float32)
+            bias = np.asarray(bias, dtype=np.float32)
+            if quantize:
+                scale = np.abs(kernel).max(axis=0) / 127
+                scale[scale == 0] = 1
+                kernel = np.round(kernel / scale).astype(np.int8)
+                self.layers.append((kernel, scale.astype(np.float32), bias))
+            else:
+                self.layers.append((kernel, None, bias))
+
+    @classmethod
+    def initialize(cls, sizes, seed=None, quantize=False):
+        # Glorot-uniform kernels and zero biases, the same initialization Keras uses for Dense layers
+        rng = np.random.default_rng(seed)
+        weights = []
+        for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+            limit = np.sqrt(6 / (fan_in + fan_out))
+            weights.append(rng.uniform(-limit, limit, (fan_in, fan_out)).astype(np.float32))
+            weights.append(np.zeros(fan_out, dtype=np.float32))
+        return cls(weights, quantize)
+
+    @classmethod
+    def load(cls, path, quantize=False):
+        with np.load(path) as data:
+            weights = [data[f'arr_{i}'] for i in range(len(data.files))]
+        return cls(weights, quantize)
+
+    @staticmethod
+    def save_weights(weights, path):
+        # Written to a temporary file and renamed so readers never see a partial checkpoint
+        temporary_path = f'{path}.tmp.npz'
+        np.savez(temporary_path, *[np.asarray(weight, dtype=np.float32) for weight in weights])
+        os.replace(temporary_path, path)
+
+    def get_weights(self):
+        weights = []
+        for kernel, scale, bias in self.layers:
+            weights.append(kernel.astype(np.float32) * scale if scale is not None else kernel)
+            weights.append(bias)
+        return weights
+
+    def predict(self, states):
+        activations = np.asarray(states, dtype=np.float32).reshape(-1, self.layers[0][0].shape[0])
+        last = len(self.layers) - 1
+        for i, (kernel, scale, bias) in enumerate(self.layers):
+            activations = activations @ kernel
+            if scale is not None:
+                activations *= scale
+            activations += bias
+            if i < last:
+                np.maximum(activations, 0, out=activations)
+        return activations
@@ -1,124 +1,320 @@
 import random
+import threading
+import time
 import numpy as np
-from collections import deque
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.optimizers import Adam
+from datetime import datetime
 from backend.utils.logger import training_logger, optimization_logger
+from backend.models.container import to_timestamp
+from backend.models.yard import blocking_cells
+from .replay_memory import ReplayMemory
+from .heuristic import position_scores, best_actions
+from .numpy_inference import NumpyPolicy
+from .checkpoints import CheckpointStore
 import os
 
 class Optimizer:
-    def __init__(self, yard):
+    STRATEGIES = ('dqn', 'heuristic')
+
+    HIDDEN_UNITS = (64, 64)
+
+    def __init__(self, yard, memory_size=2000, prioritized_replay=False, memory_path=None, strategy='dqn',
+                 quantize_inference=False, checkpoint_dir=None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown placement strategy: {strategy}")
         self.yard = yard
+        self.strategy = strategy
         self.state_size = yard.config.length * yard.config.width * yard.config.height * 4  # 4 features per position
         self.action_size = yard.config.length * yard.config.width * yard.config.height
-        self.memory = deque(maxlen=2000)
+        # Only an optimizer that records or trains needs a replay memory; memory_size=0 skips it
+        self.memory = ReplayMemory(memory_size, self.state_size, prioritized=prioritized_replay,
+                                   path=memory_path) if memory_size else None
         self.gamma = 0.95    # discount rate
         self.epsilon = 1.0   # exploration rate
         self.epsilon_min = 0.01
         self.epsilon_decay = 0.995
         self.learning_rate = 0.001
-        self.model = self._build_model()
+        self.use_target_network = True
+        self.target_update_interval = 10  # training steps between target network syncs
+        self.train_steps = 0
+        self.target_model = None
         self.model_path = os.path.join('backend', 'models', 'dqn_model.h5')
-        self._load_model()
+        self.policy_path = os.path.splitext(self.model_path)[0] + '.npz'
+        self.quantize_inference = quantize_inference
+        # Versioned checkpoints published by the training worker and hot-swapped into serving
+        self.checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+        self.policy_version = 0
+        self.last_reoptimized = float('-inf')  # timestamp of the previous reoptimization pass
+        # TensorFlow is imported and the model built or loaded on first use, see `model`
+        self._model = None
+        self._model_lock = threading.Lock()
         self.training_progress = {
             'episodes': 0,
             'epsilon': self.epsilon,
             'loss': 0,
             'accuracy': 0
         }
+        # NumPy copy of the network used for request-path inference
+        self.policy = self._load_policy()
+        self.ready = False
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
 
     def _build_model(self):
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense
+        from tensorflow.keras.optimizers import Adam
         model = Sequential()
-        model.add(Dense(64, input_shape=(self.state_size,), activation='relu'))
-        model.add(Dense(64, activation='relu'))
+        model.add(Dense(self.HIDDEN_UNITS[0], input_shape=(self.state_size,), activation='relu'))
+        model.add(Dense(self.HIDDEN_UNITS[1], activation='relu'))
         model.add(Dense(self.action_size, activation='linear'))
         model.compile(loss='mse', optimizer=Adam(learning_rate=self.learning_rate))
         return model
 
     def _load_model(self):
         if os.path.exists(self.model_path):
-            self.model = load_model(self.model_path)
+            from tensorflow.keras.models import load_model
+            model = load_model(self.model_path)
             training_logger.info("Loaded existing model")
-        else:
-            training_logger.info("No existing model found, using new model")
+            if self.policy is None:
+                self._export_policy(model)
+            return model
+        training_logger.info("No existing model found, using new model")
+        model = self._build_model()
+        if self.policy is not None:
+            # Start training from the weights that are already being served
+            model.set_weights(self.policy.get_weights())
+        return model
+
+    def _load_policy(self):
+        latest = self.checkpoints.latest() if self.checkpoints is not None else None
+        if latest is not None:
+            try:
+                policy = self.checkpoints.load(latest, quantize=self.quantize_inference)
+            except FileNotFoundError:
+                training_logger.warning(f"Checkpoint {latest['file']} is missing, ignoring it")
+            else:
+                self._apply_checkpoint(latest)
+                return policy
+        if os.path.exists(self.policy_path):
+            return NumpyPolicy.load(self.policy_path, quantize=self.quantize_inference)
+        if os.path.exists(self.model_path):
+            return None  # exported from the Keras checkpoint once it is loaded
+        sizes = (self.state_size,) + self.HIDDEN_UNITS + (self.action_size,)
+        return NumpyPolicy.initialize(sizes, quantize=self.quantize_inference)
+
+    def _export_policy(self, model):
+        weights = model.get_weights()
+        NumpyPolicy.save_weights(weights, self.policy_path)
+        self.policy = NumpyPolicy(weights, quantize=self.quantize_inference)
+
+    def _apply_checkpoint(self, entry):
+        self.policy_version = entry['version']
+        progress = entry.get('progress', {})
+        self.training_progress.update(progress)
+        self.epsilon = progress.get('epsilon', self.epsilon)
+
+    def refresh_policy(self):
+        # Swaps in the newest published checkpoint; the policy reference is replaced in one
+        # assignment, so requests in flight keep using the weights they started with
+        latest = self.checkpoints.latest() if self.checkpoints is not None else None
+        if latest is None or latest['version'] <= self.policy_version:
+            return False
+        try:
+            policy = self.checkpoints.load(latest, quantize=self.quantize_inference)
+        except FileNotFoundError:
+            return False
+        self.policy = policy
+        self._apply_checkpoint(latest)
+        training_logger.info(f"Loaded policy checkpoint version {self.policy_version}")
+        return True
+
+    def warm_up(self):
+        # Prepares request-path inference; TensorFlow is only loaded if no NumPy policy exists yet
+        started = time.perf_counter()
+        if self.policy is None:
+            self._export_policy(self.model)
+        self.policy.predict(np.zeros((1, self.state_size), dtype=np.float32))
+        self.ready = True
+        training_logger.info(f"Model warm-up complete in {time.perf_counter() - started:.2f}s")
 
     def save_model(self):
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
         self.model.save(self.model_path)
+        self._export_policy(self.model)
+        if self.checkpoints is not None:
+            self.policy_version = self.checkpoints.publish(self.model.get_weights(), dict(self.training_progress))
         training_logger.info("Model saved")
 
-    def optimize_placement(self, container):
-        state = self._get_state()
-        if np.random.rand() <= self.epsilon:
-            return self._random_action()
-        act_values = self.model.predict(state)
-        return self._action_to_position(np.argmax(act_values[0]))
+    def optimize_placement(self, container, vacate=None):
+        # Infeasible slots are masked out, so the chosen slot is always accepted by the yard.
+        # `vacate` is the container's own cell when it is reconsidered: the cell is scored as
+        # empty, so the container does not have to be taken out of the yard first.
+        mask = self.yard.feasible_mask(container.weight, vacate).ravel()
+        if not mask.any():
+            return None
+        if self._explore():
+            return self._random_action(mask)
+        return self._action_to_position(np.argmax(np.where(mask, self._action_scores(container, vacate), -np.inf)))
+
+    def _explore(self):
+        return self.strategy == 'dqn' and np.random.rand() <= self.epsilon
+
+    def _action_scores(self, container, vacate=None):
+        # One score per slot for the current yard state from the selected strategy
+        state = self.yard.refresh_state()
+        if vacate is not None:
+            state = state.copy()
+            state[vacate] = 0
+        if self.strategy == 'heuristic':
+            return position_scores(state, self.yard.rehandles_if_placed(container, vacate)).ravel()
+        if self.policy is not None:
+            return self.policy.predict(state.reshape(1, -1))[0]
+        return self.model.predict(state.reshape(1, -1), verbose=0)[0]
+
+    def place_batch(self, containers, chunk_size=64):
+        # Places containers one after another so every decision sees the previous ones;
+        # Q-values only depend on the yard state and are refreshed once per chunk
+        # (every placement for the heuristic, which is cheap and reacts to its own choices)
+        results = []
+        act_values, scored_at = None, 0
+        for i, container in enumerate(containers):
+            # The yard lock is held per container, from the feasibility mask to the placement
+            with self.yard.lock:
+                if container.id in self.yard.positions:
+                    results.append({"id": container.id, "placed": False, "position": None, "error": "Duplicate container id"})
+                    continue
+                mask = self.yard.feasible_mask(container.weight).ravel()
+                if not mask.any():
+                    results.append({"id": container.id, "placed": False, "position": None, "error": "No feasible slot available"})
+                    continue
+                if self._explore():
+                    position = self._random_action(mask)
+                else:
+                    if act_values is None or self.strategy == 'heuristic' or i - scored_at >= chunk_size:
+                        act_values, scored_at = self._action_scores(container), i
+                    position = self._action_to_position(np.argmax(np.where(mask, act_values, -np.inf)))
+                self.yard.add_container(container, position)
+            results.append({"id": container.id, "placed": True, "position": position, "error": None})
+        optimization_logger.info(f"Batch placement complete. Placed {sum(r['placed'] for r in results)} of {len(results)} containers")
+        return results
 
     def _get_state(self):
-        state = np.zeros((self.yard.config.length, self.yard.config.width, self.yard.config.height, 4))
-        for container in self.yard.containers.values():
-            pos = self.yard.get_container_position(container.id)
-            if pos:
-                x, y, z = pos
-                state[x][y][z] = [
-                    1,  # Container present
-                    container.weight / self.yard.config.max_weight_per_stack,  # Normalized weight
-                    container.days_until_departure() / 30 if container.days_until_departure() is not None else 0,  # Normalized days until departure
-                    1 if container.is_overdue() else 0  # Overdue flag
-                ]
-        return state.reshape(1, -1)
-
-    def _random_action(self):
-        available_positions = []
-        for x in range(self.yard.config.length):
-            for y in range(self.yard.config.width):
-                for z in range(self.yard.config.height):
-                    if self.yard.grid[x][y][z] is None:
-                        available_positions.append((x, y, z))
-        return random.choice(available_positions) if available_positions else None
+        # View of the yard's persistent state buffer; copy it before storing
+        return self.yard.refresh_state().reshape(1, -1)
+
+    def _random_action(self, mask=None):
+        available_actions = np.flatnonzero(~self.yard.occupancy.ravel() if mask is None else mask)
+        if not len(available_actions):
+            return None
+        return self._action_to_position(available_actions[random.randrange(len(available_actions))])
 
     def _action_to_position(self, action):
+        action = int(action)
         x = action // (self.yard.config.width * self.yard.config.height)
         y = (action % (self.yard.config.width * self.yard.config.height)) // self.yard.config.height
         z = action % self.yard.config.height
         return (x, y, z)
 
-    def reoptimize(self):
-        containers = list(self.yard.containers.values())
-        containers.sort(key=lambda c: (c.is_overdue(), -c.days_until_departure() if c.days_until_departure() is not None else 0))
-        moves = 0
+    def reoptimize(self, max_moves=None, time_budget=None, full=False):
+        # Reconsiders only containers whose stacks changed or that became overdue since the
+        # last pass, unless `full` is set. When a budget runs out the moves made so far are
+        # kept and the remaining candidates are left dirty for the next pass.
+        # The yard lock is taken per candidate, so placements can interleave with a long pass.
+        # Candidates are scored in place and only a container that changes cells is moved.
+        started = time.monotonic()
+        clock = datetime.now()
+        now = to_timestamp(clock)
+        with self.yard.lock:
+            candidates = self.yard.take_dirty()
+            candidates.update(self.yard.containers_departing_between(self.last_reoptimized, now))
+            if full:
+                candidates = set(self.yard.containers)
+        self.last_reoptimized = now
+
+        # Only the candidate list comes from a snapshot; it is dropped before the first move so
+        # the moves do not have to copy the yard's dicts for it
+        snapshot = self.yard.snapshot()
+        containers = [snapshot.containers[container_id] for container_id in candidates if container_id in snapshot.containers]
+        del snapshot
+        containers.sort(key=lambda c: (c.is_overdue(clock), -c.days_until_departure(clock) if c.departure_date is not None else 0))
+        moves = []
+        considered = 0
         for container in containers:
-            current_pos = self.yard.get_container_position(container.id)
-            self.yard.remove_container(container.id)
-            new_pos = self.optimize_placement(container)
-            if new_pos and new_pos != current_pos:
-                self.yard.add_container(container, new_pos)
-                moves += 1
-            else:
-                self.yard.add_container(container, current_pos)
-        optimization_logger.info(f"Reoptimization complete. Containers moved: {moves}")
+            if (max_moves is not None and len(moves) >= max_moves) or \
+                    (time_budget is not None and time.monotonic() - started >= time_budget):
+                with self.yard.lock:
+                    self.yard.dirty.update(c.id for c in containers[considered:])
+                optimization_logger.info(f"Reoptimization budget exhausted, {len(containers) - considered} containers deferred")
+                break
+            considered += 1
+            with self.yard.lock:
+                current_pos = self.yard.get_container_position(container.id)
+                if current_pos is None:
+                    continue
+                x, y, z = current_pos
+                if z + 1 < self.yard.config.height and self.yard.occupancy[x, y, z + 1]:
+                    # Only a container with nothing on top can be lifted, so every move stays executable
+                    continue
+                new_pos = self.optimize_placement(container, vacate=current_pos)
+                if new_pos is None or new_pos == current_pos:
+                    continue
+                # A move is only kept if it does not bury more containers than before: lifting
+                # the container frees it if it was blocking, and it blocks at the new stack if
+                # something there leaves earlier
+                if self.yard.rehandles_if_placed(container)[new_pos[:2]] > self.yard.blocking[current_pos]:
+                    continue
+                self.yard.track_changes = False
+                try:
+                    if self.yard.move_container(container.id, new_pos):
+                        moves.append((container.id, current_pos, new_pos))
+                finally:
+                    self.yard.track_changes = True
+        with self.yard.lock:
+            self.yard.metrics.record_optimized_moves(len(moves))
+        optimization_logger.info(f"Reoptimization complete. Containers considered: {considered}, moved: {len(moves)}")
         return moves
 
-    def calculate_metrics(self):
-        total_containers = len(self.yard.containers)
-        total_weight = sum(container.weight for container in self.yard.containers.values())
-        overdue_containers = sum(1 for container in self.yard.containers.values() if container.is_overdue())
-        avg_days_until_departure = np.mean([container.days_until_departure() for container in self.yard.containers.values() if container.days_until_departure() is not None])
+    def calculate_metrics(self, full=False):
+        # Served from a copy of the yard's running aggregates; `full` recomputes everything from
+        # the containers of a consistent yard snapshot
+        if not full:
+            return self.yard.metrics_snapshot().snapshot(to_timestamp(datetime.now()))
+        snapshot = self.yard.snapshot()
+        total_containers = len(snapshot.containers)
+        total_weight = sum(container.weight for container in snapshot.containers.values())
+        overdue_containers = sum(1 for container in snapshot.containers.values() if container.is_overdue())
+        days_until_departure = [container.days_until_departure() for container in snapshot.containers.values() if container.departure_date is not None]
+        avg_days_until_departure = float(np.mean(days_until_departure)) if days_until_departure else None
         
-        total_moves = sum(abs(x) + abs(y) + abs(z) 
-                          for container in self.yard.containers.values()
-                          for x, y, z in [self.yard.get_container_position(container.id)])
+        total_moves = sum(abs(x) + abs(y) + abs(z) for x, y, z in snapshot.positions.values())
         
         energy_consumption = total_moves * self.yard.config.crane_energy_consumption
         carbon_emissions = energy_consumption * self.yard.config.carbon_emission_factor
         
-        yard_utilization = len(self.yard.containers) / (self.yard.config.length * self.yard.config.width * self.yard.config.height)
+        yard_utilization = len(snapshot.positions) / self.yard.capacity
         
-        stack_heights = [max([z for x, y, z in [self.yard.get_container_position(c.id)] if x == i and y == j] + [0])
-                         for i in range(self.yard.config.length) for j in range(self.yard.config.width)]
-        avg_stack_height = np.mean(stack_heights)
-        max_stack_height = max(stack_heights)
+        # Stack height is the highest occupied level + 1, 0 for an empty stack
+        avg_stack_height = float(snapshot.stack_heights.mean())
+        max_stack_height = int(snapshot.stack_heights.max())
+
+        config = self.yard.config
+        occupancy = np.zeros((config.length, config.width, config.height), dtype=bool)
+        departures = np.full(occupancy.shape, np.nan)
+        for container_id, position in snapshot.positions.items():
+            occupancy[position] = True
+            departure = to_timestamp(snapshot.containers[container_id].departure_date)
+            departures[position] = np.nan if departure is None else departure
+        expected_rehandles = int(blocking_cells(departures, occupancy)[0].sum())
 
         return {
             "total_containers": total_containers,
@@ -126,90 +322,73 @@ class Optimizer:
             "overdue_containers": overdue_containers,
             "avg_days_until_departure": avg_days_until_departure,
             "total_moves": total_moves,
+            "optimized_moves": snapshot.metrics.optimized_moves,
             "energy_consumption": energy_consumption,
             "carbon_emissions": carbon_emissions,
             "yard_utilization": yard_utilization,
             "avg_stack_height": avg_stack_height,
-            "max_stack_height": max_stack_height
+            "max_stack_height": max_stack_height,
+            "expected_rehandles": expected_rehandles
         }
 
-    def train(self, batch_size):
-        if len(self.memory) < batch_size:
+    def remember(self, state, action, reward, next_state, done):
+        self.memory.push(state, action, reward, next_state, done)
+
+    def _sync_target_model(self):
+        if self.target_model is None:
+            self.target_model = self._build_model()
+        self.target_model.set_weights(self.model.get_weights())
+
+    def _train_step(self, states, actions, rewards, next_states, dones, weights=None):
+        # One forward pass for the bootstrap targets, one for the current estimates, one gradient update
+        if self.use_target_network and self.target_model is None:
+            self._sync_target_model()
+        target_model = self.target_model if self.use_target_network else self.model
+        next_q = target_model.predict_on_batch(next_states)
+        targets = np.array(self.model.predict_on_batch(states))
+        rows = np.arange(len(actions))
+        td_targets = rewards + self.gamma * np.amax(next_q, axis=1) * (1 - dones)
+        td_errors = td_targets - targets[rows, actions]
+        targets[rows, actions] = td_targets
+        loss = self.model.train_on_batch(states, targets, sample_weight=weights)
+
+        self.train_steps += 1
+        if self.use_target_network and self.train_steps % self.target_update_interval == 0:
+            self._sync_target_model()
+        return float(loss), td_errors
+
+    def train(self, batch_size, steps=1):
+        # `steps` minibatch updates, then one accuracy estimate and one save/publish for the round
+        if self.memory is None or len(self.memory) < batch_size:
             return
-        minibatch = random.sample(self.memory, batch_size)
-        losses = []
-        for state, action, reward, next_state, done in minibatch:
-            target = reward
-            if not done:
-                target = (reward + self.gamma *
-                          np.amax(self.model.predict(next_state)[0]))
-            target_f = self.model.predict(state)
-            target_f[0][action] = target
-            history = self.model.fit(state, target_f, epochs=1, verbose=0)
-            losses.append(history.history['loss'][0])
-        if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
-        
-        self.training_progress['episodes'] += 1
+        for _ in range(steps):
+            states, actions, rewards, next_states, dones, indices, weights = self.memory.sample(batch_size)
+            loss, td_errors = self._train_step(states, actions, rewards, next_states, dones, weights)
+            self.memory.update_priorities(indices, td_errors)
+            if self.epsilon > self.epsilon_min:
+                self.epsilon *= self.epsilon_decay
+
+        self.training_progress['episodes'] += steps
         self.training_progress['epsilon'] = self.epsilon
-        self.training_progress['loss'] = np.mean(losses)
+        self.training_progress['loss'] = loss
         self.training_progress['accuracy'] = self.calculate_accuracy()
 
         training_logger.info(f"Training complete. Epsilon: {self.epsilon}, Loss: {self.training_progress['loss']}, Accuracy: {self.training_progress['accuracy']}")
         self.save_model()
 
-    def calculate_accuracy(self):
-        correct_predictions = 0
-        total_predictions = 100
-
-        for _ in range(total_predictions):
-            state = self._get_state()
-            predicted_action = np.argmax(self.model.predict(state)[0])
-            optimal_action = self._get_optimal_action(state)
-            if predicted_action == optimal_action:
-                correct_predictions += 1
-
-        return correct_predictions / total_predictions
-
-    def _get_optimal_action(self, state):
-        # Implement a heuristic to determine the optimal action
-        state_reshaped = state.reshape((self.yard.config.length, self.yard.config.width, self.yard.config.height, 4))
-        best_score = float('-inf')
-        best_action = None
-
-        for x in range(self.yard.config.length):
-            for y in range(self.yard.config.width):
-                for z in range(self.yard.config.height):
-                    if state_reshaped[x][y][z][0] == 0:  # Empty position
-                        score = self._calculate_position_score(x, y, z, state_reshaped)
-                        if score > best_score:
-                            best_score = score
-                            best_action = x * self.yard.config.width * self.yard.config.height + y * self.yard.config.height + z
-
-        return best_action if best_action is not None else random.randint(0, self.action_size - 1)
-
-    def _calculate_position_score(self, x, y, z, state):
-        # Calculate a score for placing a container at the given position
-        # Higher score means better placement
-        score = 0
-        
-        # Prefer lower positions
-        score -= z * 10
-        
-        # Prefer positions with containers below
-        if z > 0 and state[x][y][z-1][0] == 1:
-            score += 5
-        
-        # Prefer positions away from overdue containers
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                for dz in [-1, 0, 1]:
-                    nx, ny, nz = x + dx, y + dy, z + dz
-                    if 0 <= nx < self.yard.config.length and 0 <= ny < self.yard.config.width and 0 <= nz < self.yard.config.height:
-                        if state[nx][ny][nz][3] == 1:  # Overdue container
-                            score -= 3
-        
-        return score
+    def calculate_accuracy(self, sample_size=100):
+        # Agreement between the network's greedy action and the heuristic's, over the current
+        # state plus states sampled from replay memory, scored with one batched forward pass
+        states = self._get_state().copy()
+        if self.memory is not None and len(self.memory):
+            states = np.vstack([states, self.memory.sample(sample_size - 1)[0]])
+        predicted_actions = np.argmax(self.model.predict_on_batch(states), axis=1)
+        optimal_actions = self._get_optimal_actions(states)
+        return float(np.mean(predicted_actions == optimal_actions))
+
+    def _get_optimal_actions(self, states):
+        config = self.yard.config
+        return best_actions(states, (config.length, config.width, config.height))
 
     def get_training_progress(self):
         return self.training_progress
@@ -0,0 +1,167 @@
+import os
+import numpy as np
+
+
+class SumTree:
+    # Binary tree of priorities stored in a flat array; leaves start at self.leaves
+    def __init__(self, capacity):
+        self.leaves = 1 << max(capacity - 1, 0).bit_length()
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices) + self.leaves]
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices) + self.leaves
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+            if nodes[0] == 0:
+                break
+
+    def find(self, values):
+        # Descend all sampled prefix sums at once, one tree level per iteration
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            go_right = values > self.tree[left]
+            values = np.where(go_right, values - self.tree[left], values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaves
+
+
+class ReplayMemory:
+    # Preallocated ring buffer of transitions, optionally memory-mapped under `path`
+    def __init__(self, capacity, state_size, prioritized=False, alpha=0.6, beta=0.4,
+                 state_dtype=np.float16, path=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.state_dtype = np.dtype(state_dtype)
+        self.path = path
+        self.rng = np.random.default_rng()
+
+        self._recreated = False  # set by _allocate when an existing file did not match
+        self.states = self._allocate('states', (capacity, state_size), self.state_dtype)
+        self.next_states = self._allocate('next_states', (capacity, state_size), self.state_dtype)
+        self.actions = self._allocate('actions', (capacity,), np.int32)
+        self.rewards = self._allocate('rewards', (capacity,), np.float32)
+        self.dones = self._allocate('dones', (capacity,), np.uint8)
+        self.meta = self._allocate('meta', (2,), np.int64)  # write position, size
+        position, size = int(self.meta[0]), int(self.meta[1])
+        if self._recreated or not (0 <= position < capacity and 0 <= size <= capacity):
+            # The stored transitions no longer exist or do not fit this layout: start empty
+            self.meta[:] = 0
+
+        self.tree = SumTree(capacity) if prioritized else None
+        self.max_priority = 1.0
+        if self.tree is not None and len(self):
+            self.tree.update(np.arange(len(self)), np.ones(len(self)))
+        self._synced_position = int(self.meta[0])
+
+    def _allocate(self, name, shape, dtype):
+        if self.path is None:
+            return np.zeros(shape, dtype=dtype)
+        os.makedirs(self.path, exist_ok=True)
+        file_path = os.path.join(self.path, f'{name}.npy')
+        if os.path.exists(file_path):
+            array = np.load(file_path, mmap_mode='r+')
+            if array.shape == shape and array.dtype == dtype:
+                return array
+            self._recreated = True
+        return np.lib.format.open_memmap(file_path, mode='w+', dtype=dtype, shape=shape)
+
+    def __len__(self):
+        return int(self.meta[1])
+
+    def _quantize(self, states):
+        states = np.asarray(states, dtype=np.float32).reshape(-1, self.state_size)
+        if self.state_dtype == np.uint8:
+            # uint8 storage keeps [0, 1] features at 1/255 resolution
+            return np.round(np.clip(states, 0, 1) * 255).astype(np.uint8)
+        return states.astype(self.state_dtype)
+
+    def _dequantize(self, states):
+        if self.state_dtype == np.uint8:
+            return states.astype(np.float32) / 255
+        return states.astype(np.float32)
+
+    def push(self, state, action, reward, next_state, done):
+        self.push_batch(state, [action], [reward], next_state, [done])
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        actions = np.asarray(actions)
+        count = len(actions)
+        if count > self.capacity:
+            # Only the newest `capacity` transitions would survive anyway
+            keep = slice(count - self.capacity, count)
+            states, next_states = np.asarray(states)[keep], np.asarray(next_states)[keep]
+            actions, rewards, dones = actions[keep], np.asarray(rewards)[keep], np.asarray(dones)[keep]
+            count = self.capacity
+        position, size = int(self.meta[0]), int(self.meta[1])
+        indices = (position + np.arange(count)) % self.capacity
+        self.states[indices] = self._quantize(states)
+        self.next_states[indices] = self._quantize(next_states)
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.dones[indices] = dones
+        if self.tree is not None:
+            # New transitions get the current max priority so they are replayed at least once
+            self.tree.update(indices, np.full(count, self.max_priority))
+        self.meta[0] = (position + count) % self.capacity
+        self.meta[1] = min(size + count, self.capacity)
+        self._synced_position = int(self.meta[0])
+        return indices
+
+    def sync(self):
+        # Picks up transitions another process appended to the same memory-mapped files;
+        # they get the max priority like local pushes. Returns the number of new transitions.
+        position = int(self.meta[0])
+        count = (position - self._synced_position) % self.capacity
+        if count and self.tree is not None:
+            indices = (self._synced_position + np.arange(count)) % self.capacity
+            self.tree.update(indices, np.full(count, self.max_priority))
+        self._synced_position = position
+        return count
+
+    def sample(self, batch_size):
+        size = len(self)
+        if self.tree is None:
+            indices = self.rng.integers(0, size, batch_size)
+            weights = np.ones(batch_size, dtype=np.float32)
+        else:
+            total = self.tree.total()
+            # Stratified sampling: one draw from each of batch_size equal segments
+            segments = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+            indices = np.minimum(self.tree.find(segments), size - 1)
+            probabilities = np.maximum(self.tree.get(indices) / total, 1e-12)
+            weights = (size * probabilities) ** -self.beta
+            weights = (weights / weights.max()).astype(np.float32)
+        return (
+            self._dequantize(self.states[indices]),
+            self.actions[indices].astype(np.int64),
+            self.rewards[indices],
+            self._dequantize(self.next_states[indices]),
+            self.dones[indices].astype(np.float32),
+            indices,
+            weights
+        )
+
+    def update_priorities(self, indices, td_errors):
+        if self.tree is not None:
+            priorities = (np.abs(td_errors) + 1e-6) ** self.alpha
+            self.tree.update(indices, priorities)
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def flush(self):
+        for array in (self.states, self.next_states, self.actions, self.rewards, self.dones, self.meta):
+            if isinstance(array, np.memmap):
+                array.flush()
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+from backend.utils.logger import training_logger
+
+
+def configure_threads(threads):
+    # Caps the math libraries' thread pools (and lowers the process priority) so training
+    # cannot take the cores the serving process needs. Must run before TensorFlow is imported.
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                     'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[variable] = str(threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+
+def run_training_worker(yard_config, memory_size, prioritized_replay, memory_path, checkpoint_dir,
+                        model_path, batch_size, interval, threads, stop_event, simulator_envs=0, simulator_steps=0,
+                        train_steps=1):
+    configure_threads(threads)
+    from backend.models.yard import Yard
+    from backend.simulator.simulator import YardSimulator, collect_experience
+    from .optimizer import Optimizer
+    optimizer = Optimizer(Yard(yard_config),
+                          memory_size=memory_size,
+                          prioritized_replay=prioritized_replay,
+                          memory_path=memory_path,
+                          checkpoint_dir=checkpoint_dir)
+    if model_path:
+        optimizer.model_path = model_path
+        optimizer.policy_path = os.path.splitext(model_path)[0] + '.npz'
+    # Simulated yards supply the experience; a memory under `memory_path` also picks up
+    # transitions any other process appends to it
+    simulator = YardSimulator(yard_config, num_envs=simulator_envs) if simulator_envs and simulator_steps else None
+    if simulator is not None:
+        simulator.reset()
+    training_logger.info(f"Training worker started (pid {os.getpid()}, {threads} threads)")
+    while not stop_event.is_set():
+        new_transitions = optimizer.memory.sync()
+        if new_transitions:
+            training_logger.info(f"Training worker picked up {new_transitions} new transitions")
+        try:
+            if simulator is not None:
+                collected = collect_experience(simulator, optimizer, simulator_steps)
+                training_logger.info(f"Simulated {collected['transitions']} transitions, mean reward {collected['mean_reward']:.3f}")
+            optimizer.train(batch_size, steps=train_steps)
+        except Exception as e:
+            training_logger.error(f"Training worker step failed: {str(e)}")
+        stop_event.wait(interval)
+    training_logger.info("Training worker stopped")
+
+
+class TrainingWorker:
+    # Runs DQN training in a separate process that owns the replay memory (memory-mapped when
+    # `memory_path` is set); new weights come back as versioned checkpoints.
+    def __init__(self, yard_config, memory_size, memory_path, checkpoint_dir, prioritized_replay=False,
+                 model_path=None, batch_size=32, interval=60, threads=1, simulator_envs=0, simulator_steps=0,
+                 train_steps=1):
+        self.kwargs = {
+            "yard_config": yard_config,
+            "memory_size": memory_size,
+            "prioritized_replay": prioritized_replay,
+            "memory_path": memory_path,
+            "checkpoint_dir": checkpoint_dir,
+            "model_path": model_path,
+            "batch_size": batch_size,
+            "interval": interval,
+            "threads": threads,
+            "simulator_envs": simulator_envs,
+            "simulator_steps": simulator_steps,
+            "train_steps": train_steps
+        }
+        # spawn rather than fork: the serving process has threads and possibly TensorFlow state
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_event = None
+        self.process = None
+
+    def start(self):
+        if self.is_alive():
+            return
+        self.stop_event = self.context.Event()
+        self.process = self.context.Process(target=run_training_worker,
+                                            kwargs=dict(self.kwargs, stop_event=self.stop_event),
+                                            name='training-worker', daemon=True)
+        self.process.start()
+        training_logger.info(f"Started training worker process {self.process.pid}")
+
+    def stop(self, timeout=10):
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
@@ -0,0 +1,199 @@
+import numpy as np
+from datetime import datetime, timedelta
+from backend.models.container import Container
+from backend.models.yard import Yard
+from backend.optimizer.heuristic import position_scores
+from backend.optimizer.move_planner import GATE
+
+
+class YardSimulator:
+    # Discrete-event simulation of `num_envs` yards stepped in lockstep on NumPy arrays.
+    # Each step places the pending arrival at the chosen slot, advances every clock by an
+    # exponential inter-arrival time, retrieves due containers (rehandling the ones stacked
+    # on top, which drop down one level) and draws the next arrival.
+    # Observations match Yard.state, flattened actions match Optimizer's action space.
+    def __init__(self, config, num_envs=16, episode_length=200, arrival_interval=0.25,
+                 dwell_days=(1, 30), weight_range=(1000, 5000), retrievals_per_step=1,
+                 rehandle_penalty=5.0, invalid_penalty=10.0, seed=None):
+        self.config = config
+        self.num_envs = num_envs
+        self.shape = (config.length, config.width, config.height)
+        self.action_size = int(np.prod(self.shape))
+        self.episode_length = episode_length
+        self.arrival_interval = arrival_interval  # days between arrivals, on average
+        self.dwell_days = dwell_days
+        self.weight_range = weight_range
+        self.retrievals_per_step = retrievals_per_step
+        self.rehandle_penalty = rehandle_penalty
+        self.invalid_penalty = invalid_penalty
+        self.rng = np.random.default_rng(seed)
+        # Crane costs come from the yard model so simulated and real moves are priced the same
+        self.cost_model = Yard(config)
+        self.envs = np.arange(num_envs)
+
+        shape = (num_envs,) + self.shape
+        self.occupancy = np.zeros(shape, dtype=bool)
+        self.weights = np.zeros(shape, dtype=np.float64)
+        self.departures = np.full(shape, np.nan)  # days on the env's clock, NaN when empty
+        self.now = np.zeros(num_envs)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.pending_weight = np.zeros(num_envs)
+        self.pending_departure = np.zeros(num_envs)
+
+    def reset(self, envs=None):
+        envs = self.envs if envs is None else np.asarray(envs)
+        self.occupancy[envs] = False
+        self.weights[envs] = 0
+        self.departures[envs] = np.nan
+        self.now[envs] = 0
+        self.steps[envs] = 0
+        self._draw_arrivals(envs)
+        return self.observe()
+
+    def _draw_arrivals(self, envs):
+        self.pending_weight[envs] = self.rng.uniform(*self.weight_range, len(envs))
+        self.pending_departure[envs] = self.now[envs] + self.rng.uniform(*self.dwell_days, len(envs))
+
+    def observe(self):
+        # (num_envs, L, W, H, 4): present, normalized weight, days until departure / 30, overdue
+        remaining = self.departures - self.now[:, None, None, None]
+        state = np.empty(self.occupancy.shape + (4,), dtype=np.float32)
+        state[..., 0] = self.occupancy
+        state[..., 1] = self.weights / self.config.max_weight_per_stack
+        state[..., 2] = np.fmax(np.floor(remaining), 0) / 30
+        state[..., 3] = remaining < 0
+        return state
+
+    def action_masks(self, weights=None):
+        # Slots where the pending container (or `weights`, one per env) could legally go
+        weights = self.pending_weight if weights is None else np.asarray(weights)
+        supported = np.ones_like(self.occupancy)
+        supported[..., 1:] = self.occupancy[..., :-1]
+        weight_below = np.cumsum(self.weights, axis=-1) - self.weights
+        within_limit = weight_below + weights[:, None, None, None] <= self.config.max_weight_per_stack
+        return ~self.occupancy & supported & within_limit
+
+    def _decode(self, actions):
+        return np.unravel_index(np.asarray(actions, dtype=np.int64), self.shape)
+
+    def step(self, actions):
+        # Returns (observations, rewards, dones, info); finished envs are not reset automatically
+        x, y, z = self._decode(actions)
+        envs = self.envs
+        valid = self.action_masks()[envs, x, y, z]
+        placed = envs[valid]
+        self.occupancy[placed, x[valid], y[valid], z[valid]] = True
+        self.weights[placed, x[valid], y[valid], z[valid]] = self.pending_weight[valid]
+        self.departures[placed, x[valid], y[valid], z[valid]] = self.pending_departure[valid]
+        gate = tuple(np.full(self.num_envs, v, dtype=np.int64) for v in GATE)
+        move_time = np.where(valid, self.cost_model.calculate_move_time(gate, (x, y, z)), 0)
+        energy = np.where(valid, self.cost_model.calculate_move_energy(gate, (x, y, z)), 0)
+        rewards = -(move_time + energy) - self.invalid_penalty * ~valid
+
+        self.now += self.rng.exponential(self.arrival_interval, self.num_envs)
+        rehandles = np.zeros(self.num_envs, dtype=np.int64)
+        retrieved = np.zeros(self.num_envs, dtype=np.int64)
+        for _ in range(self.retrievals_per_step):
+            step_rehandles, step_time, step_energy, step_retrieved = self._retrieve_due()
+            rehandles += step_rehandles
+            retrieved += step_retrieved
+            move_time += step_time
+            energy += step_energy
+            rewards -= step_time + step_energy + self.rehandle_penalty * step_rehandles
+
+        self.steps += 1
+        self._draw_arrivals(envs)
+        full = ~self.action_masks().reshape(self.num_envs, -1).any(axis=1)
+        dones = (self.steps >= self.episode_length) | full
+        info = {"valid": valid, "rehandles": rehandles, "retrieved": retrieved,
+                "move_time": move_time, "energy": energy}
+        return self.observe(), rewards.astype(np.float32), dones, info
+
+    def _retrieve_due(self):
+        # Takes out the most overdue container of every env that has one due; containers above
+        # it are rehandled and put back on the same stack, one level lower
+        due = np.where(self.occupancy & (self.departures <= self.now[:, None, None, None]), self.departures, np.inf)
+        flat = due.reshape(self.num_envs, -1)
+        cells = np.argmin(flat, axis=1)
+        has_due = np.isfinite(flat[self.envs, cells])
+        envs = self.envs[has_due]
+        x, y, z = self._decode(cells[has_due])
+        height = self.shape[2]
+
+        rehandles = np.zeros(self.num_envs, dtype=np.int64)
+        move_time = np.zeros(self.num_envs)
+        energy = np.zeros(self.num_envs)
+        if not len(envs):
+            return rehandles, move_time, energy, has_due.astype(np.int64)
+        levels = np.arange(height)
+        rehandles[envs] = (self.occupancy[envs, x, y] & (levels > z[:, None])).sum(axis=1)
+        gate = tuple(np.full(len(envs), v, dtype=np.int64) for v in GATE)
+        move_time[envs] = self.cost_model.calculate_move_time((x, y, z), gate)
+        energy[envs] = self.cost_model.calculate_move_energy((x, y, z), gate)
+
+        # Shift every level above the retrieved one down by one and clear the top
+        source = np.where(levels >= z[:, None], levels + 1, levels)
+        top = source >= height
+        source = np.minimum(source, height - 1)
+        for array, empty in ((self.occupancy, False), (self.weights, 0), (self.departures, np.nan)):
+            column = np.take_along_axis(array[envs, x, y], source, axis=1)
+            column[top] = empty
+            array[envs, x, y] = column
+        return rehandles, move_time, energy, has_due.astype(np.int64)
+
+
+def select_actions(env, states, optimizer, epsilon=None):
+    # Epsilon-greedy over legal slots, scored the same way the optimizer scores the live yard
+    masks = env.action_masks().reshape(env.num_envs, -1)
+    epsilon = optimizer.epsilon if epsilon is None else epsilon
+    if optimizer.strategy == 'heuristic':
+        scores = position_scores(states).reshape(env.num_envs, -1)
+    elif optimizer.policy is not None:
+        scores = optimizer.policy.predict(states.reshape(env.num_envs, -1))
+    else:
+        scores = np.asarray(optimizer.model.predict_on_batch(states.reshape(env.num_envs, -1)))
+    actions = np.argmax(np.where(masks, scores, -np.inf), axis=1)
+    explore = env.rng.random(env.num_envs) < epsilon
+    if explore.any():
+        # A uniformly random legal slot per exploring env
+        noise = np.where(masks[explore], env.rng.random(masks[explore].shape), -1)
+        actions[explore] = np.argmax(noise, axis=1)
+    return actions
+
+
+def collect_experience(env, optimizer, steps, epsilon=None):
+    # Runs all envs for `steps` steps and pushes every transition into the optimizer's replay
+    # memory; finished envs are reset after their terminal transition is stored
+    states = env.observe()
+    total_rewards = 0.0
+    for _ in range(steps):
+        actions = select_actions(env, states, optimizer, epsilon)
+        next_states, rewards, dones, _ = env.step(actions)
+        optimizer.memory.push_batch(states.reshape(env.num_envs, -1), actions, rewards,
+                                    next_states.reshape(env.num_envs, -1), dones)
+        total_rewards += float(rewards.sum())
+        if dones.any():
+            next_states = env.reset(np.flatnonzero(dones))
+        states = next_states
+    return {"transitions": steps * env.num_envs, "mean_reward": total_rewards / (steps * env.num_envs)}
+
+
+def generate_containers(count, start=None, arrival_interval=0.25, dwell_days=(1, 30),
+                        weight_range=(1000, 5000), destinations=("Port A", "Port B", "Port C"), seed=None):
+    # Arrival/departure stream as Container objects, for load-testing the API and the real yard
+    rng = np.random.default_rng(seed)
+    start = start or datetime.now()
+    arrivals = np.cumsum(rng.exponential(arrival_interval, count))
+    departures = arrivals + rng.uniform(*dwell_days, count)
+    weights = rng.uniform(*weight_range, count)
+    destination_choice = rng.integers(0, len(destinations), count)
+    return [
+        Container(
+            id=f"SIM{i:06d}",
+            weight=round(float(weights[i]), 1),
+            destination=destinations[destination_choice[i]],
+            arrival_date=(start + timedelta(days=float(arrivals[i]))).strftime("%Y-%m-%d"),
+            departure_date=(start + timedelta(days=float(departures[i]))).strftime("%Y-%m-%d")
+        )
+        for i in range(count)
+    ]
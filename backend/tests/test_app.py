@@ -0,0 +1,127 @@
+import os
+import unittest
+import uuid
+from unittest import mock
+from sqlalchemy.orm import sessionmaker
+import backend.app as server
+from backend.models.container import Container
+from backend.models.database import Base, make_engine
+from backend.tests.test_csv_parser import CSV_DATA, multipart_body
+
+class TestApp(unittest.TestCase):
+    # Runs against the module-level app with an in-memory database and an emptied yard
+    def setUp(self):
+        self.engine = make_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory, server.SessionLocal = server.SessionLocal, sessionmaker(bind=self.engine)
+        self.strategy, server.optimizer.strategy = server.optimizer.strategy, 'heuristic'
+        for container_id in list(server.yard.containers):
+            server.yard.remove_container(container_id)
+        server.container_pages.clear()
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': os.environ.get('API_KEY')}
+
+    def tearDown(self):
+        server.SessionLocal = self.session_factory
+        server.optimizer.strategy = self.strategy
+        for container_id in list(server.yard.containers):
+            server.yard.remove_container(container_id)
+        self.engine.dispose()
+
+    def add(self, container_id, departure="2030-05-10", position=None, **fields):
+        container = Container(id=container_id, weight=fields.pop('weight', 1000), destination=fields.pop('destination', "Port A"),
+                              arrival_date="2030-05-01", departure_date=departure, **fields)
+        if position is None:
+            position = (len(server.yard.containers) % 10, len(server.yard.containers) // 10, 0)
+        self.assertTrue(server.yard.add_container(container, position))
+        return container
+
+    def test_update_validates_before_assigning(self):
+        self.add("C1", position=(0, 0, 0))
+        response = self.client.put('/container/C1', json={"weight": "heavy", "destination": "Port B"}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        container = server.yard.containers["C1"]
+        self.assertEqual((container.weight, container.destination), (1000.0, "Port A"))
+        self.assertEqual(self.client.put('/container/C1', json={"departure_date": "soon"}, headers=self.headers).status_code, 400)
+        response = self.client.put('/container/C1', json={"weight": 1500, "departure_date": "2030-06-01"}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(container.weight, 1500.0)
+        self.assertEqual(server.yard.weights[server.yard.get_container_position("C1")], 1500.0)
+
+    def test_multipart_upload_is_streamed(self):
+        upload = lambda body: self.client.post('/upload_csv', data=body, headers=self.headers,
+                                               content_type='multipart/form-data; boundary=b0und')
+        response = upload(multipart_body("b0und"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json['placed'], response.json['failed']), (2, 2))
+        self.assertEqual(sorted(server.yard.containers), ["C001", "C004"])
+        self.assertEqual(upload(multipart_body("b0und", filename="containers.txt")).status_code, 400)
+        self.assertEqual(upload(multipart_body("b0und")[:60]).status_code, 400)
+
+    def test_duplicate_job_id_is_rejected(self):
+        job_id = uuid.uuid4().hex
+        upload = lambda: self.client.post('/upload_csv', query_string={'job_id': job_id}, data=CSV_DATA,
+                                          headers=self.headers, content_type='text/csv')
+        self.assertEqual(upload().status_code, 200)
+        response = upload()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f'/upload_csv/{job_id}', headers=self.headers).json['placed'], 2)
+
+    def test_unchanged_listing_is_not_modified(self):
+        self.add("C1")
+        response = self.client.get('/containers', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        response = self.client.get('/containers', headers=dict(self.headers, **{'If-None-Match': etag}))
+        self.assertEqual((response.status_code, response.data), (304, b''))
+        self.add("C2")
+        response = self.client.get('/containers', headers=dict(self.headers, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['id'] for c in response.json], ["C1", "C2"])
+
+    def test_cursor_pages_continue_across_inserts(self):
+        for i in range(1, 8):
+            self.add(f"C{i}")
+        seen, cursor = [], None
+        while True:
+            query = {'limit': 3, 'fields': 'id', **({'cursor': cursor} if cursor else {})}
+            page = self.client.get('/containers', query_string=query, headers=self.headers).json
+            seen.extend(c['id'] for c in page['containers'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+            # Inserted before the cursor, so it must not shift the pages still to come
+            self.add(f"A{len(seen)}")
+        self.assertEqual(seen, [f"C{i}" for i in range(1, 8)])
+        self.assertEqual(page['total'], 9)
+
+    def test_large_listing_is_streamed(self):
+        for i in range(7):
+            self.add(f"C{i}")
+        with mock.patch.object(server.config, 'CONTAINER_PAGE_MAX', 5):
+            response = self.client.get('/containers', query_string={'fields': 'id,weight'}, headers=self.headers)
+            self.assertTrue(response.is_streamed)
+            self.assertEqual(response.json, [{"id": f"C{i}", "weight": 1000.0} for i in range(7)])
+            self.assertFalse(server.container_pages.entries)
+            self.assertEqual(self.client.get('/containers', query_string={'limit': 6}, headers=self.headers).status_code, 400)
+
+    def test_departure_date_filters_exclude_their_date(self):
+        for day in (10, 11, 12):
+            self.add(f"D{day}", departure=f"2030-05-{day}")
+        ids = lambda **query: [c['id'] for c in self.client.get('/containers', query_string=dict(query, fields='id'),
+                                                                headers=self.headers).json]
+        self.assertEqual(ids(departs_after="2030-05-10", departs_before="2030-05-12"), ["D11"])
+        self.assertEqual(ids(departs_before="2030-05-11"), ["D10"])
+        self.assertEqual(ids(departs_after="2030-05-11"), ["D12"])
+        self.assertEqual(ids(departs_after="2030-05-11", departs_before="2030-05-12"), [])
+
+    def test_invalid_listing_queries(self):
+        self.add("C1")
+        for query in ({'limit': 'abc'}, {'limit': 0}, {'priority': 'high'}, {'departing_within_hours': 'soon'},
+                      {'departs_after': '2030/05/01'}, {'departs_before': 'tomorrow'}, {'fields': 'id,colour'}):
+            response = self.client.get('/containers', query_string=query, headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn("error", response.json)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from backend.benchmarks.suite import run, compare, scaling_exponents
+
+def case(size, cells, fill, median_us):
+    return {"size": size, "cells": cells, "fill": fill, "ops": {"op": {"median_us": median_us}}}
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_scaling_exponents(self):
+        results = [case("a", 100, 0.5, 10), case("b", 1000, 0.5, 100), case("c", 10000, 0.5, 1000)]
+        self.assertAlmostEqual(scaling_exponents(results)["op"]["0.5"], 1.0)
+
+    def test_compare(self):
+        baseline = {"results": [case("a", 100, 0.5, 10), case("b", 1000, 0.5, 10)]}
+        baseline["scaling"] = scaling_exponents(baseline["results"])
+        current = {"results": [case("a", 100, 0.5, 11), case("b", 1000, 0.5, 100)]}
+        current["scaling"] = scaling_exponents(current["results"])
+        regressions = compare(current, baseline, tolerance=0.25)
+        self.assertEqual([(r["kind"], r.get("size")) for r in regressions], [("time", "b"), ("scaling", None)])
+        self.assertEqual(compare(baseline, baseline), [])
+
+    def test_run_small_case(self):
+        results = run(sizes=[(4, 4, 2)], fills=[0.5], operations=["add_container", "remove_container", "get_container_position",
+                                                                  "calculate_metrics", "metrics_after_write", "snapshot_after_write"], samples=5)
+        ops = results["results"][0]["ops"]
+        self.assertEqual(set(ops), {"add_container", "remove_container", "get_container_position", "calculate_metrics",
+                                    "metrics_after_write", "snapshot_after_write", "write_after_snapshot"})
+        self.assertEqual(results["results"][0]["containers"], 16)
+
+if __name__ == '__main__':
+    unittest.main()
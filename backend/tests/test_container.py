@@ -1,6 +1,6 @@
 import unittest
 from datetime import datetime, timedelta
-from backend.models.container import Container
+from backend.models.container import Container, StoredContainer
 from backend.models.yard import Yard
 from backend.models.yard_config import YardConfig
 from backend.optimizer.optimizer import Optimizer
@@ -29,5 +29,22 @@ class TestContainer(unittest.TestCase):
         self.assertEqual(container_dict['weight'], 1000)
         self.assertEqual(container_dict['destination'], "Port A")
 
+    def test_to_dict_fields(self):
+        now = datetime(2023, 5, 8, 12)
+        container_dict = self.container.to_dict(now)
+        self.assertEqual(tuple(container_dict), Container.FIELDS)
+        self.assertEqual(container_dict['departure_date'], "2023-05-10")
+        self.assertEqual(container_dict['days_until_departure'], 1)
+        self.assertFalse(container_dict['is_overdue'])
+        self.assertEqual(self.container.to_dict(now, fields=('id', 'is_overdue')), {"id": "CONT001", "is_overdue": False})
+
+    def test_stored_container(self):
+        self.assertEqual(Container.COLUMNS, tuple(column.name for column in Container.__table__.columns))
+        stored, = StoredContainer.from_rows([self.container.to_row()])
+        self.assertNotIsInstance(stored, Container)
+        self.assertEqual(stored.to_row(), self.container.to_row())
+        now = datetime(2023, 5, 8, 12)
+        self.assertEqual(stored.to_dict(now), self.container.to_dict(now))
+
 if __name__ == '__main__':
     unittest.main()
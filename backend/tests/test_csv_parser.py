@@ -0,0 +1,41 @@
+import io
+import unittest
+from backend.utils.csv_parser import parse_csv, chunked, open_text_stream, CountingReader, MultipartFileReader
+
+CSV_DATA = (
+    "id,weight,destination,arrival_date,departure_date\n"
+    "C001,1000,Port A,2023-06-01,2023-06-10\n"
+    "C002,heavy,Port B,2023-06-02,2023-06-12\n"
+    "C003,1500,Port C,2023-06-02,\n"
+    "C004,2000,Port A,2023-06-03,2023-06-14\n"
+)
+
+def multipart_body(boundary, filename="containers.csv", data=CSV_DATA):
+    return (f"--{boundary}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nnightly\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: text/csv\r\n\r\n{data}\r\n--{boundary}--\r\n").encode()
+
+class TestCsvParser(unittest.TestCase):
+    def test_streaming_parse(self):
+        errors = []
+        reader = CountingReader(io.BytesIO(CSV_DATA.encode()))
+        containers = parse_csv(open_text_stream(reader), errors)
+        self.assertEqual(next(containers).id, "C001")
+        self.assertEqual([c.id for c in containers], ["C004"])
+        self.assertEqual([line for line, _ in errors], [3, 4])
+        self.assertEqual(reader.bytes_read, len(CSV_DATA))
+
+    def test_multipart_file_reader(self):
+        body = io.BytesIO(multipart_body("b0und"))
+        reader = MultipartFileReader(body, "b0und", chunk_size=7)
+        self.assertEqual(reader.open(), "containers.csv")
+        self.assertEqual([c.id for c in parse_csv(open_text_stream(reader))], ["C001", "C004"])
+        self.assertEqual(body.tell(), len(body.getvalue()))
+        empty = f"--b0und\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nx\r\n--b0und--\r\n".encode()
+        self.assertIsNone(MultipartFileReader(io.BytesIO(empty), "b0und").open())
+
+    def test_chunked(self):
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from backend.models.container import Container
+from backend.models.database import Base, make_engine, upsert
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.engine = make_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def container(self, id, weight):
+        return Container(id=id, weight=weight, destination="Port A", arrival_date="2023-05-01", departure_date="2023-05-10")
+
+    def test_upsert(self):
+        upsert(self.db, Container.__table__, [self.container("A", 100).to_row(), self.container("B", 200).to_row()])
+        upsert(self.db, Container.__table__, [self.container("B", 300).to_row(), self.container("C", 400).to_row()])
+        self.db.commit()
+        rows = self.db.execute(select(Container.id, Container.weight).order_by(Container.id)).all()
+        self.assertEqual([tuple(row) for row in rows], [("A", 100.0), ("B", 300.0), ("C", 400.0)])
+        upsert(self.db, Container.__table__, [])
+
+if __name__ == '__main__':
+    unittest.main()
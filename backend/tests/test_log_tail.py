@@ -0,0 +1,53 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from backend.utils.log_tail import tail, follow
+
+class TestLogTail(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'app.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text, mode='a'):
+        with open(self.path, mode) as f:
+            f.write(text)
+
+    def test_tail(self):
+        self.write(''.join(f'line {i}\n' for i in range(1000)), 'w')
+        lines, offset = tail(self.path, 3, block_size=16)
+        self.assertEqual(lines, ['line 997\n', 'line 998\n', 'line 999\n'])
+        self.assertEqual(offset, os.path.getsize(self.path))
+        self.assertEqual(len(tail(self.path, 5000)[0]), 1000)
+        self.assertEqual(tail(self.path, 0)[0], [])
+        self.write('partial')
+        self.assertEqual(tail(self.path, 2, block_size=7)[0], ['line 999\n', 'partial'])
+
+    def test_follow_across_rotation(self):
+        self.write('old\n', 'w')
+        _, offset = tail(self.path, 10)
+
+        def writer():
+            time.sleep(0.1)
+            self.write('first\nsec')
+            time.sleep(0.1)
+            self.write('ond\n')
+            time.sleep(0.1)
+            os.replace(self.path, self.path + '.1')
+            self.write('rotated\n', 'w')
+        thread = threading.Thread(target=writer)
+        thread.start()
+        lines = []
+        for line in follow(self.path, offset, timeout=2, poll_interval=0.02):
+            lines.append(line)
+            if len(lines) == 3:
+                break
+        thread.join()
+        self.assertEqual(lines, ['first\n', 'second\n', 'rotated\n'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from backend.models.yard import Yard
+from backend.models.yard_config import YardConfig
+from backend.optimizer.move_planner import plan_moves, precedence, nearest_neighbour_order, two_opt
+
+class TestMovePlanner(unittest.TestCase):
+    def setUp(self):
+        config = YardConfig(
+            length=20, width=20, height=4,
+            energy_consumption_rate=0.1,
+            carbon_emission_factor=0.5,
+            max_weight_per_stack=10000,
+            crane_speed=2,
+            crane_energy_consumption=5
+        )
+        self.yard = Yard(config)
+
+    def test_precedence(self):
+        moves = [("A", (0, 0, 1), (5, 5, 0)),   # top of stack (0, 0)
+                 ("B", (0, 0, 0), (5, 5, 1)),   # below A, and lands on A
+                 ("C", (7, 7, 0), (0, 0, 0))]   # into B's old cell
+        plan = plan_moves(self.yard, moves)
+        self.assertEqual([move[0] for move in plan.moves], ["A", "B", "C"])
+        self.assertEqual(plan.unresolved_dependencies, 0)
+
+    def test_plan_reduces_travel(self):
+        rng = np.random.default_rng(0)
+        cells = rng.permutation([(x, y) for x in range(20) for y in range(20)])[:60]
+        moves = [(f"C{i}", (int(cells[i][0]), int(cells[i][1]), 0), (int(cells[i + 30][0]), int(cells[i + 30][1]), 0))
+                 for i in range(30)]
+        plan = plan_moves(self.yard, moves)
+        self.assertEqual(sorted(move[0] for move in plan.moves), sorted(move[0] for move in moves))
+        self.assertLess(plan.total_time, plan.unordered_time)
+        self.assertAlmostEqual(plan.total_energy, plan.total_time * self.yard.config.crane_energy_consumption)
+        result = plan.to_dict()
+        self.assertEqual(len(result["moves"]), 30)
+        self.assertAlmostEqual(result["estimated_time"], sum(m["travel_time"] + m["move_time"] for m in result["moves"]))
+
+    def test_two_opt_keeps_dependencies(self):
+        rng = np.random.default_rng(1)
+        sources = np.column_stack([rng.integers(0, 4, 40), rng.integers(0, 4, 40), rng.integers(0, 4, 40)])
+        destinations = np.column_stack([rng.integers(0, 4, 40), rng.integers(0, 4, 40), rng.integers(0, 4, 40)])
+        before = precedence(sources, destinations)
+        travel = rng.random((40, 40))
+        start = rng.random(40)
+        order, unresolved = nearest_neighbour_order(travel, start, before)
+        improved = two_opt(order, travel, start, before)
+        cost = lambda o: start[o[0]] + travel[o[:-1], o[1:]].sum()
+        self.assertLessEqual(cost(np.array(improved)), cost(np.array(order)) + 1e-9)
+        if not unresolved:
+            position = np.argsort(improved)
+            self.assertFalse((before & (position[:, None] > position[None, :])).any())
+
+    def test_empty_plan(self):
+        self.assertEqual(plan_moves(self.yard, []).to_dict()["moves"], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,17 @@
+import os
+import tempfile
+import threading
 import unittest
+import numpy as np
+from datetime import datetime, timedelta
 from backend.models.container import Container
 from backend.models.yard import Yard
 from backend.models.yard_config import YardConfig
 from backend.optimizer.optimizer import Optimizer
+from backend.optimizer.numpy_inference import NumpyPolicy
+from backend.optimizer.inference_scheduler import InferenceScheduler
+from backend.optimizer.checkpoints import CheckpointStore
+from backend.optimizer.move_planner import plan_moves
 
 class TestOptimizer(unittest.TestCase):
     def setUp(self):
@@ -36,5 +45,244 @@ class TestOptimizer(unittest.TestCase):
         self.assertIn("total_moves", metrics)
         self.assertIn("optimized_moves", metrics)
 
+    def test_get_state(self):
+        self.container.departure_date = datetime.now() + timedelta(days=6, hours=1)
+        self.yard.add_container(self.container, (1, 2, 0))
+        state = self.optimizer._get_state().reshape(5, 5, 3, 4)
+        self.assertEqual(state.dtype, 'float32')
+        self.assertAlmostEqual(state[1, 2, 0, 1], 0.2)
+        self.assertAlmostEqual(state[1, 2, 0, 2], 6 / 30)
+        self.assertEqual(state[1, 2, 0, 3], 0)
+        self.container.departure_date = datetime.now() - timedelta(days=1)
+        self.yard.refresh_container(self.container.id)
+        state = self.optimizer._get_state().reshape(5, 5, 3, 4)
+        self.assertEqual(state[1, 2, 0, 2], 0)
+        self.assertEqual(state[1, 2, 0, 3], 1)
+        self.yard.remove_container(self.container.id)
+        self.assertFalse(self.optimizer._get_state().any())
+
+    def test_train_step(self):
+        self.optimizer.target_update_interval = 2
+        states = np.zeros((4, self.optimizer.state_size), dtype=np.float32)
+        actions = np.array([0, 1, 2, 3])
+        rewards = np.array([1, 0, -1, 0], dtype=np.float32)
+        dones = np.array([1, 0, 0, 1], dtype=np.float32)
+        loss, td_errors = self.optimizer._train_step(states, actions, rewards, states, dones)
+        self.assertIsInstance(loss, float)
+        self.assertEqual(td_errors.shape, (4,))
+        self.assertIsNotNone(self.optimizer.target_model)
+        self.optimizer._train_step(states, actions, rewards, states, dones)
+        for target, online in zip(self.optimizer.target_model.get_weights(), self.optimizer.model.get_weights()):
+            np.testing.assert_array_equal(target, online)
+
+    def test_train_round_publishes_once(self):
+        states = np.zeros((40, self.optimizer.state_size), dtype=np.float32)
+        self.optimizer.memory.push_batch(states, np.zeros(40), np.zeros(40), states, np.zeros(40))
+        saves = []
+        self.optimizer.save_model = lambda: saves.append(self.optimizer.train_steps)
+        self.optimizer.train(batch_size=8, steps=3)
+        self.assertEqual(saves, [3])
+        self.assertEqual(self.optimizer.training_progress['episodes'], 3)
+        # Without a replay memory there is nothing to train on
+        serving = Optimizer(self.yard, memory_size=0)
+        self.assertIsNone(serving.memory)
+        serving.train(batch_size=8)
+        self.assertEqual(serving.train_steps, 0)
+
+    def test_placement_respects_feasibility(self):
+        self.optimizer.epsilon = 0
+        for i in range(5 * 5 * 3):
+            container = Container(id=f"C{i}", weight=1000, destination="Port A",
+                                  arrival_date="2023-05-01", departure_date="2023-05-10")
+            position = self.optimizer.optimize_placement(container)
+            self.assertTrue(self.yard.add_container(container, position))
+            x, y, z = position
+            self.assertTrue(z == 0 or self.yard.occupancy[x, y, z - 1])
+        self.assertIsNone(self.optimizer.optimize_placement(self.container))
+
+    def test_place_batch(self):
+        containers = [Container(id=f"C{i}", weight=2000, destination="Port A",
+                                arrival_date="2023-05-01", departure_date="2023-05-10") for i in range(80)]
+        containers.append(containers[0])
+        results = self.optimizer.place_batch(containers, chunk_size=16)
+        placed = [result for result in results if result['placed']]
+        self.assertEqual(len(placed), 50)  # two 2000 kg containers per 5000 kg stack
+        self.assertEqual(len({result['position'] for result in placed}), 50)
+        self.assertEqual(results[-1]['error'], "Duplicate container id")
+        self.assertEqual(len(self.yard.containers), 50)
+
+    def test_incremental_reoptimize(self):
+        for i in range(10):
+            self.yard.add_container(Container(id=f"C{i}", weight=1000, destination="Port A",
+                                              arrival_date="2023-05-01", departure_date="2099-05-10"), (i % 5, i // 5, 0))
+        self.assertEqual(len(self.yard.dirty), 10)
+        moves = self.optimizer.reoptimize(max_moves=3)
+        self.assertLessEqual(len(moves), 3)
+        self.optimizer.reoptimize()
+        self.assertEqual(self.yard.dirty, set())
+        self.yard.containers["C1"].departure_date = datetime.now() + timedelta(days=2)
+        self.yard.refresh_container("C1")
+        x, y, _ = self.yard.get_container_position("C1")
+        self.assertEqual(self.yard.dirty, {c.id for c in self.yard.grid[x][y] if c})
+
+    def test_incremental_metrics_match_full(self):
+        for i in range(12):
+            container = Container(id=f"C{i}", weight=500 + i * 100, destination="Port A",
+                                  arrival_date="2023-05-01", departure_date=f"20{23 + i % 3 * 40}-05-{10 + i}")
+            self.yard.add_container(container, self.optimizer.optimize_placement(container))
+        self.yard.remove_container("C3")
+        self.yard.move_container("C4", (4, 4, 2))
+        self.yard.containers["C5"].weight = 100
+        self.yard.containers["C5"].departure_date = None
+        self.yard.refresh_container("C5")
+        self.optimizer.reoptimize()
+        incremental, full = self.optimizer.calculate_metrics(), self.optimizer.calculate_metrics(full=True)
+        self.assertEqual(incremental.keys(), full.keys())
+        for key in full:
+            self.assertAlmostEqual(incremental[key], full[key], places=6, msg=key)
+
+    def test_heuristic_strategy(self):
+        optimizer = Optimizer(self.yard, strategy='heuristic')
+        overdue = Container(id="OVERDUE", weight=1000, destination="Port A",
+                            arrival_date="2023-05-01", departure_date="2023-05-02")
+        self.yard.add_container(overdue, (0, 0, 0))
+        position = optimizer.optimize_placement(self.container)
+        self.assertEqual(position[2], 0)
+        self.assertGreater(max(abs(position[0]), abs(position[1])), 1)
+        self.assertRaises(ValueError, Optimizer, self.yard, strategy='greedy')
+
+    def test_calculate_accuracy(self):
+        states = np.zeros((10, self.optimizer.state_size), dtype=np.float32)
+        self.optimizer.memory.push_batch(states, np.zeros(10), np.zeros(10), states, np.zeros(10))
+        accuracy = self.optimizer.calculate_accuracy(sample_size=20)
+        self.assertGreaterEqual(accuracy, 0)
+        self.assertLessEqual(accuracy, 1)
+
+    def test_numpy_policy_matches_keras(self):
+        self.yard.add_container(self.container, (1, 1, 0))
+        state = self.optimizer._get_state()
+        expected = self.optimizer.model.predict(state, verbose=0)
+        np.testing.assert_allclose(self.optimizer.policy.predict(state), expected, rtol=1e-4, atol=1e-5)
+        quantized = NumpyPolicy(self.optimizer.model.get_weights(), quantize=True)
+        np.testing.assert_allclose(quantized.predict(state), expected, atol=0.05)
+        with tempfile.TemporaryDirectory() as path:
+            self.optimizer.model_path = os.path.join(path, 'dqn_model.h5')
+            self.optimizer.policy_path = os.path.join(path, 'dqn_model.npz')
+            self.optimizer.save_model()
+            reloaded = NumpyPolicy.load(self.optimizer.policy_path)
+            np.testing.assert_allclose(reloaded.predict(state), expected, rtol=1e-4, atol=1e-5)
+
+    def test_inference_scheduler(self):
+        scheduler = InferenceScheduler(self.optimizer, window_ms=20)
+        futures = [scheduler.submit(Container(id=f"C{i}", weight=1000, destination="Port A",
+                                              arrival_date="2023-05-01", departure_date="2023-05-10"))
+                   for i in range(30)]
+        results = [future.result(timeout=10) for future in futures]
+        self.assertTrue(all(result['placed'] for result in results))
+        self.assertEqual(len({result['position'] for result in results}), 30)
+        stats = scheduler.get_stats()
+        self.assertEqual(stats['placements'], 30)
+        self.assertLess(stats['batches'], 30)
+
+    def test_inference_scheduler_timeout(self):
+        scheduler = InferenceScheduler(self.optimizer, window_ms=1)
+        started, release = threading.Event(), threading.Event()
+        place_batch = self.optimizer.place_batch
+        def slow_place_batch(containers, chunk_size=64):
+            started.set()
+            release.wait(10)
+            return place_batch(containers, chunk_size)
+        self.optimizer.place_batch = slow_place_batch
+        container = lambda id: Container(id=id, weight=1000, destination="Port A", arrival_date="2023-05-01",
+                                         departure_date="2023-05-10")
+        # "A" is already being placed when it times out, "B" is still queued behind it
+        with self.assertRaises(TimeoutError):
+            scheduler.place(container("A"), timeout=0.2)
+        self.assertTrue(started.is_set())
+        with self.assertRaises(TimeoutError):
+            scheduler.place(container("B"), timeout=0.05)
+        release.set()
+        self.assertTrue(scheduler.place(container("C"), timeout=10)['placed'])
+        self.assertEqual(sorted(self.yard.containers), ["C"])
+        self.assertEqual(scheduler.get_stats()['placements'], 2)
+
+    def test_checkpoint_hot_swap(self):
+        with tempfile.TemporaryDirectory() as path:
+            serving = Optimizer(self.yard, checkpoint_dir=path)
+            self.assertFalse(serving.refresh_policy())
+            store = CheckpointStore(path, keep=2)
+            sizes = (serving.state_size,) + Optimizer.HIDDEN_UNITS + (serving.action_size,)
+            for seed in range(3):
+                weights = NumpyPolicy.initialize(sizes, seed=seed).get_weights()
+                version = store.publish(weights, {'episodes': seed + 1, 'epsilon': 0.5})
+            self.assertEqual(version, 3)
+            self.assertEqual(sorted(f for f in os.listdir(path) if f.endswith('.npz')),
+                             ['policy-000002.npz', 'policy-000003.npz'])
+            self.assertTrue(serving.refresh_policy())
+            self.assertFalse(serving.refresh_policy())
+            self.assertEqual(serving.policy_version, 3)
+            self.assertEqual(serving.epsilon, 0.5)
+            self.assertEqual(serving.get_training_progress()['episodes'], 3)
+            state = serving._get_state()
+            np.testing.assert_allclose(serving.policy.predict(state), NumpyPolicy(weights).predict(state))
+            # A new process starts from the latest published checkpoint
+            self.assertEqual(Optimizer(self.yard, checkpoint_dir=path).policy_version, 3)
+
+    def test_reads_during_reoptimization(self):
+        self.optimizer.strategy = 'heuristic'
+        for i in range(40):
+            self.optimizer.place_batch([Container(id=f"C{i}", weight=100, destination="Port A",
+                                                  arrival_date="2023-05-01", departure_date="2023-05-10")])
+        done = threading.Event()
+        def reoptimize():
+            for _ in range(5):
+                self.optimizer.reoptimize(full=True)
+            done.set()
+        worker = threading.Thread(target=reoptimize)
+        worker.start()
+        while not done.is_set():
+            snapshot = self.yard.snapshot()
+            self.assertEqual(len(snapshot.containers), 40)
+            self.assertEqual(len(set(snapshot.positions.values())), 40)
+            self.assertEqual(self.optimizer.calculate_metrics()['total_containers'], 40)
+        worker.join()
+
+    def test_reoptimize_keeps_container_on_error(self):
+        self.yard.add_container(self.container, (1, 1, 0))
+        def fail(container, vacate=None):
+            raise ValueError("scoring failed")
+        self.optimizer.optimize_placement = fail
+        with self.assertRaises(ValueError):
+            self.optimizer.reoptimize(full=True)
+        self.assertEqual(self.yard.get_container_position("CONT001"), (1, 1, 0))
+        self.assertIn("CONT001", self.yard.containers)
+
+    def test_reoptimize_leaves_unmoved_containers_alone(self):
+        self.optimizer.strategy = 'heuristic'
+        self.yard.add_container(self.container, (0, 0, 0))
+        version = self.yard.version
+        self.assertEqual(self.optimizer.reoptimize(full=True), [])
+        self.assertEqual(self.yard.version, version)
+
+    def test_reoptimize_plan_is_executable(self):
+        self.optimizer.strategy = 'heuristic'
+        rng = np.random.default_rng(0)
+        for i in range(30):
+            departure = (datetime.now() + timedelta(days=int(rng.integers(1, 30)))).strftime("%Y-%m-%d")
+            self.yard.add_container(Container(id=f"C{i}", weight=500, destination="Port A", arrival_date="2023-05-01",
+                                              departure_date=departure), (i // 3 % 5, i // 15, i % 3))
+        start = dict(self.yard.positions)
+        plan = plan_moves(self.yard, self.optimizer.reoptimize(full=True))
+        self.assertTrue(plan.moves)
+        occupied = set(start.values())
+        for container_id, (x, y, z), (dx, dy, dz) in plan.moves:
+            self.assertIn((x, y, z), occupied, container_id)
+            self.assertNotIn((x, y, z + 1), occupied, f"{container_id} is not on top of its stack")
+            occupied.remove((x, y, z))
+            self.assertNotIn((dx, dy, dz), occupied, container_id)
+            self.assertTrue(dz == 0 or (dx, dy, dz - 1) in occupied, f"{container_id} would float")
+            occupied.add((dx, dy, dz))
+        self.assertEqual(occupied, set(self.yard.positions.values()))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from backend.optimizer.replay_memory import ReplayMemory, SumTree
+
+class TestReplayMemory(unittest.TestCase):
+    def setUp(self):
+        self.memory = ReplayMemory(capacity=8, state_size=4)
+
+    def push(self, memory, count, start=0):
+        states = np.arange(start, start + count, dtype=np.float32)[:, None].repeat(4, axis=1) / 100
+        memory.push_batch(states, np.arange(start, start + count), np.ones(count), states, np.zeros(count))
+
+    def test_ring_buffer_wraps(self):
+        self.push(self.memory, 6)
+        self.push(self.memory, 6, start=6)
+        self.assertEqual(len(self.memory), 8)
+        self.assertEqual(sorted(self.memory.actions), list(range(4, 12)))
+
+    def test_sample_batch(self):
+        self.push(self.memory, 5)
+        states, actions, rewards, next_states, dones, indices, weights = self.memory.sample(16)
+        self.assertEqual(states.shape, (16, 4))
+        self.assertEqual(states.dtype, np.float32)
+        np.testing.assert_allclose(states[:, 0], actions / 100, atol=1e-3)
+        self.assertTrue((indices < 5).all())
+        self.assertTrue((weights == 1).all())
+
+    def test_prioritized_sampling(self):
+        memory = ReplayMemory(capacity=8, state_size=4, prioritized=True)
+        self.push(memory, 8)
+        memory.update_priorities(np.arange(8), np.array([0, 0, 0, 100, 0, 0, 0, 0]))
+        indices = memory.sample(64)[5]
+        self.assertGreater((indices == 3).mean(), 0.9)
+
+    def test_sum_tree_find(self):
+        tree = SumTree(5)
+        tree.update(np.arange(5), np.array([1.0, 2.0, 3.0, 4.0, 5.0]))
+        self.assertEqual(tree.total(), 15)
+        np.testing.assert_array_equal(tree.find(np.array([0.5, 1.5, 3.5, 14.9])), [0, 1, 2, 4])
+
+    def test_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as path:
+            memory = ReplayMemory(capacity=8, state_size=4, path=path)
+            self.push(memory, 3)
+            memory.flush()
+            self.assertTrue(os.path.exists(os.path.join(path, 'states.npy')))
+            reopened = ReplayMemory(capacity=8, state_size=4, path=path)
+            self.assertEqual(len(reopened), 3)
+            np.testing.assert_array_equal(reopened.actions[:3], [0, 1, 2])
+
+    def test_reopen_with_other_layout_starts_empty(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.push(ReplayMemory(capacity=8, state_size=4, path=path), 8)
+            smaller = ReplayMemory(capacity=4, state_size=4, path=path)
+            self.assertEqual(len(smaller), 0)
+            self.push(smaller, 2)
+            self.assertTrue((smaller.sample(8)[5] < 2).all())
+            wider = ReplayMemory(capacity=4, state_size=6, path=path)
+            self.assertEqual(len(wider), 0)
+            self.assertEqual(len(ReplayMemory(capacity=4, state_size=6, path=path)), 0)
+
+    def test_sync_with_shared_files(self):
+        with tempfile.TemporaryDirectory() as path:
+            writer = ReplayMemory(capacity=8, state_size=4, path=path)
+            reader = ReplayMemory(capacity=8, state_size=4, prioritized=True, path=path)
+            self.push(writer, 5)
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader.sync(), 5)
+            self.assertEqual(reader.sync(), 0)
+            self.assertAlmostEqual(reader.tree.total(), 5)
+            self.push(writer, 6, start=5)
+            self.assertEqual(reader.sync(), 6)
+            self.assertEqual(len(reader), 8)
+            self.assertAlmostEqual(reader.tree.total(), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from backend.models.yard import Yard
+from backend.models.yard_config import YardConfig
+from backend.optimizer.optimizer import Optimizer
+from backend.simulator.simulator import YardSimulator, collect_experience, generate_containers
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self):
+        self.config = YardConfig(
+            length=4, width=3, height=3,
+            energy_consumption_rate=0.1,
+            carbon_emission_factor=0.5,
+            max_weight_per_stack=10000,
+            crane_speed=2,
+            crane_energy_consumption=5
+        )
+        self.env = YardSimulator(self.config, num_envs=3, seed=0)
+        self.env.reset()
+
+    def test_step_places_and_prices_moves(self):
+        self.env.arrival_interval = 1e-9  # nothing becomes due
+        actions = np.ravel_multi_index(([0, 1, 0], [0, 2, 0], [0, 0, 1]), (4, 3, 3))
+        states, rewards, dones, info = self.env.step(actions)
+        self.assertEqual(states.shape, (3, 4, 3, 3, 4))
+        self.assertEqual(states[0, 0, 0, 0, 0], 1)
+        self.assertEqual(states[1, 1, 2, 0, 0], 1)
+        self.assertEqual(info['valid'].tolist(), [True, True, False])  # floating slot
+        self.assertFalse(self.env.occupancy[2].any())
+        yard = Yard(self.config)
+        expected = yard.calculate_move_time((0, 0, 0), (1, 2, 0)) + yard.calculate_move_energy((0, 0, 0), (1, 2, 0))
+        self.assertAlmostEqual(rewards[1], -expected, places=5)
+        self.assertAlmostEqual(rewards[2], -self.env.invalid_penalty)
+        self.assertFalse(dones.any())
+
+    def test_retrieval_rehandles(self):
+        # Stack of three in env 0 whose bottom container is due
+        self.env.occupancy[0, 1, 1] = True
+        self.env.weights[0, 1, 1] = [100, 200, 300]
+        self.env.departures[0, 1, 1] = [0.5, 10, 20]
+        self.env.now[:] = 1
+        rehandles, move_time, energy, retrieved = self.env._retrieve_due()
+        self.assertEqual(rehandles.tolist(), [2, 0, 0])
+        self.assertEqual(retrieved.tolist(), [1, 0, 0])
+        self.assertAlmostEqual(move_time[0], Yard(self.config).calculate_move_time((1, 1, 0), (0, 0, 0)))
+        self.assertEqual(self.env.occupancy[0, 1, 1].tolist(), [True, True, False])
+        self.assertEqual(self.env.weights[0, 1, 1].tolist(), [200, 300, 0])
+        self.assertTrue(np.isnan(self.env.departures[0, 1, 1, 2]))
+
+    def test_collect_experience(self):
+        optimizer = Optimizer(Yard(self.config), memory_size=1000, strategy='heuristic')
+        result = collect_experience(self.env, optimizer, 50)
+        self.assertEqual(result['transitions'], 150)
+        self.assertEqual(len(optimizer.memory), 150)
+        occupancy = self.env.occupancy
+        self.assertFalse((occupancy[..., 1:] & ~occupancy[..., :-1]).any())  # no floating containers
+        self.assertLessEqual(self.env.weights.sum(axis=-1).max(), self.config.max_weight_per_stack)
+
+    def test_generate_containers(self):
+        containers = generate_containers(20, seed=1)
+        self.assertEqual(len({c.id for c in containers}), 20)
+        self.assertTrue(all(c.departure_date >= c.arrival_date for c in containers))
+
+if __name__ == '__main__':
+    unittest.main()
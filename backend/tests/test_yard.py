@@ -1,5 +1,7 @@
+from datetime import datetime
+import threading
 import unittest
-from backend.models.container import Container
+from backend.models.container import Container, to_timestamp
 from backend.models.yard import Yard
 from backend.models.yard_config import YardConfig
 from backend.optimizer.optimizer import Optimizer
@@ -40,5 +42,129 @@ class TestYard(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(self.yard.get_container_position(self.container.id), (1, 1, 1))
 
+    def test_position_index(self):
+        self.yard.add_container(self.container, (2, 3, 0))
+        self.assertEqual(self.yard.get_container_position(self.container.id), (2, 3, 0))
+        self.assertFalse(self.yard.add_container(self.container, (0, 0, 0)))
+        self.yard.move_container(self.container.id, (4, 4, 0))
+        self.assertIs(self.yard.get_container_at((4, 4, 0)), self.container)
+        self.assertIsNone(self.yard.get_container_at((2, 3, 0)))
+        self.yard.remove_container(self.container.id)
+        self.assertIsNone(self.yard.get_container_position(self.container.id))
+        self.assertFalse(self.yard.remove_container(self.container.id))
+
+    def test_array_mirror(self):
+        heavy = Container(id="CONT002", weight=4500, destination="Port B",
+                          arrival_date="2023-05-01", departure_date="2023-05-12")
+        self.yard.add_container(self.container, (1, 2, 0))
+        self.assertTrue(self.yard.occupancy[1, 2, 0])
+        self.assertEqual(self.yard.stack_heights[1, 2], 1)
+        self.assertEqual(self.yard.stack_weights[1, 2], 1000)
+        self.assertFalse(self.yard.add_container(heavy, (1, 2, 1)))
+        self.assertEqual(len(self.yard.free_slots()), 5 * 5 * 3 - 1)
+        self.yard.move_container(self.container.id, (0, 0, 2))
+        self.assertEqual(self.yard.stack_heights[1, 2], 0)
+        self.assertEqual(self.yard.stack_heights[0, 0], 3)
+        self.assertEqual(self.yard.weights.sum(), 1000)
+
+    def test_feasible_mask(self):
+        self.yard.add_container(self.container, (0, 0, 0))
+        mask = self.yard.feasible_mask(1000)
+        self.assertFalse(mask[0, 0, 0])
+        self.assertTrue(mask[0, 0, 1])
+        self.assertFalse(mask[1, 1, 1])
+        self.assertFalse(self.yard.feasible_mask(4500)[0, 0, 1])
+        self.assertTrue(self.yard.feasible_mask(4500)[1, 1, 0])
+
+    def test_snapshot(self):
+        empty = self.yard.snapshot()
+        self.assertIs(self.yard.snapshot(), empty)
+        self.yard.add_container(self.container, (0, 0, 0))
+        snapshot = self.yard.snapshot()
+        self.assertEqual(len(empty.containers), 0)
+        self.assertEqual(snapshot.positions, {"CONT001": (0, 0, 0)})
+        self.assertEqual(snapshot.metrics.total_containers, 1)
+        # While a writer holds the lock, readers get the last snapshot instead of waiting
+        self.yard.move_container(self.container.id, (1, 1, 0))
+        locked = threading.Event()
+        release = threading.Event()
+        def hold_lock():
+            with self.yard.lock:
+                locked.set()
+                release.wait()
+        writer = threading.Thread(target=hold_lock)
+        writer.start()
+        locked.wait()
+        self.assertIs(self.yard.snapshot(), snapshot)
+        release.set()
+        writer.join()
+        self.assertEqual(self.yard.snapshot().positions, {"CONT001": (1, 1, 0)})
+
+    def test_rehandle_index(self):
+        for i, departure in enumerate(["2023-05-20", "2023-05-05", "2023-05-30"]):
+            self.yard.add_container(Container(id=f"S{i}", weight=100, destination="Port A",
+                                              arrival_date="2023-05-01", departure_date=departure), (2, 2, i))
+        # S2 sits above S1, which leaves earlier
+        self.assertEqual(self.yard.blocking[2, 2].tolist(), [False, False, True])
+        self.assertEqual(self.yard.stack_blocking[2, 2], 1)
+        self.assertEqual(self.yard.expected_rehandles, 1)
+        late = Container(id="LATE", weight=100, destination="Port A", arrival_date="2023-05-01", departure_date="2023-06-30")
+        early = Container(id="EARLY", weight=100, destination="Port A", arrival_date="2023-05-01", departure_date="2023-05-02")
+        self.assertEqual(self.yard.rehandles_if_placed(late)[2, 2], 1)
+        self.assertEqual(self.yard.rehandles_if_placed(early)[2, 2], 0)
+        self.assertEqual(self.yard.rehandles_if_placed(late)[0, 0], 0)
+        self.yard.containers["S2"].departure_date = self.yard.containers["S1"].departure_date
+        self.yard.refresh_container("S2")
+        self.assertEqual(self.yard.expected_rehandles, 0)
+        self.yard.move_container("S1", (0, 0, 0))
+        self.assertEqual(self.yard.expected_rehandles, 0)
+        self.yard.remove_container("S1")
+        self.yard.move_container("S0", (0, 0, 0))
+        self.yard.move_container("S2", (0, 0, 1))
+        self.assertEqual(self.yard.expected_rehandles, 0)
+        self.yard.move_container("S2", (1, 1, 0))
+        self.yard.move_container("S0", (1, 1, 1))
+        self.assertEqual(self.yard.expected_rehandles, 1)
+
+    def test_secondary_index(self):
+        for i, (destination, departure, priority) in enumerate([("Port A", "2023-05-20", 1), ("Port B", "2023-05-05", 3),
+                                                                 ("Port A", "2023-05-30", 2)]):
+            self.yard.add_container(Container(id=f"S{i}", weight=100, destination=destination, arrival_date="2023-05-01",
+                                              departure_date=departure, priority=priority), (i, 0, 0))
+        index = self.yard.index
+        self.assertEqual(index.with_destination("Port A"), {"S0", "S2"})
+        self.assertEqual(index.with_priority(min_priority=2), {"S1", "S2"})
+        start, end = to_timestamp(datetime(2023, 5, 5)), to_timestamp(datetime(2023, 5, 20))
+        # (start, end]: S1 departs exactly at start and is excluded, S0 exactly at end and included
+        self.assertEqual(self.yard.containers_departing_between(start, end), ["S0"])
+        self.assertEqual(index.overdue(end), ["S1"])
+        self.yard.containers["S2"].destination = "Port B"
+        self.yard.containers["S2"].departure_date = datetime(2023, 5, 10)
+        self.yard.refresh_container("S2")
+        self.assertEqual(index.with_destination("Port B"), {"S1", "S2"})
+        self.assertEqual(self.yard.containers_departing_between(start, end), ["S2", "S0"])
+        snapshot = self.yard.snapshot()
+        self.yard.remove_container("S0")
+        # The held snapshot kept the index it was taken with; the yard mutated a copy
+        self.assertIs(snapshot.index, index)
+        self.assertEqual(self.yard.index.with_destination("Port A"), set())
+        self.assertEqual(self.yard.index.departing_between(None, None), ["S1", "S2"])
+        self.assertEqual(snapshot.index.with_destination("Port A"), {"S0"})
+        self.assertIn("S0", snapshot.containers)
+
+    def test_snapshot_copy_on_write(self):
+        self.yard.add_container(self.container, (0, 0, 0))
+        containers = self.yard.containers
+        self.yard.snapshot()  # dropped right away, so the next write has nothing to copy
+        self.yard.move_container(self.container.id, (1, 1, 0))
+        self.assertIs(self.yard.containers, containers)
+        snapshot = self.yard.snapshot()
+        self.assertIs(snapshot.containers, containers)
+        self.yard.move_container(self.container.id, (2, 2, 0))
+        self.assertIsNot(self.yard.containers, containers)
+        self.assertEqual(snapshot.positions[self.container.id], (1, 1, 0))
+        self.assertEqual(self.yard.snapshot().positions[self.container.id], (2, 2, 0))
+        self.assertEqual(self.yard.metrics_snapshot().total_containers, 1)
+
 if __name__ == '__main__':
     unittest.main()
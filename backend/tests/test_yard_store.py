@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from backend.models.container import Container
+from backend.models.yard import Yard
+from backend.models.yard_config import YardConfig
+from backend.models.yard_store import YardStore
+
+class TestYardStore(unittest.TestCase):
+    def setUp(self):
+        self.config = YardConfig(
+            length=4, width=4, height=3,
+            energy_consumption_rate=0.1,
+            carbon_emission_factor=0.5,
+            max_weight_per_stack=5000,
+            crane_speed=2,
+            crane_energy_consumption=5
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def container(self, id, departure, weight=100, destination="Port A"):
+        return Container(id=id, weight=weight, destination=destination, arrival_date="2023-05-01",
+                         departure_date=departure, priority=1)
+
+    def restore(self):
+        yard = Yard(self.config)
+        store = YardStore(self.path)
+        stats = store.attach(yard)
+        store.close()
+        return yard, stats
+
+    def assert_same_yard(self, restored, yard):
+        self.assertEqual(restored.positions, yard.positions)
+        self.assertEqual({cid: c.to_row() for cid, c in restored.containers.items()},
+                         {cid: c.to_row() for cid, c in yard.containers.items()})
+        for name in ('occupancy', 'weights', 'departures', 'stack_heights', 'stack_weights', 'blocking', 'state'):
+            np.testing.assert_array_equal(getattr(restored, name), getattr(yard, name), err_msg=name)
+        self.assertEqual(restored.metrics.snapshot(0), yard.metrics.snapshot(0))
+        self.assertEqual(restored.index.departures, yard.index.departures)
+        self.assertEqual(restored.index.by_destination, yard.index.by_destination)
+
+    def test_snapshot_and_journal_replay(self):
+        yard = Yard(self.config)
+        store = YardStore(self.path)
+        store.attach(yard)
+        yard.add_container(self.container("A", "2023-05-20"), (0, 0, 0))
+        yard.add_container(self.container("B", "2023-05-05", destination="Port B"), (0, 0, 1))
+        yard.add_container(self.container("C", "bad"), (1, 0, 0))
+        self.assertEqual(store.compact(), 3)
+        yard.move_container("B", (2, 2, 0))
+        yard.remove_container("C")
+        yard.containers["A"].weight = 250.0
+        yard.refresh_container("A")
+        yard.add_container(self.container("D", "2023-05-30"), (0, 0, 1))
+        store.close()
+
+        restored, stats = self.restore()
+        self.assertEqual((stats["snapshot_containers"], stats["replayed"], stats["sequence"]), (3, 4, 7))
+        self.assert_same_yard(restored, yard)
+        self.assertEqual(restored.expected_rehandles, 1)
+
+    def test_compaction_drops_covered_journal(self):
+        yard = Yard(self.config)
+        store = YardStore(self.path)
+        store.attach(yard)
+        for i in range(3):
+            yard.add_container(self.container(f"S{i}", "2023-05-20"), (i, 0, 0))
+        store.compact()
+        yard.remove_container("S0")
+        store.close()
+        self.assertEqual(sorted(name for name in os.listdir(self.path) if name.startswith('journal-')),
+                         ['journal-000000000003.jsonl'])
+        restored, stats = self.restore()
+        self.assertEqual(sorted(restored.containers), ["S1", "S2"])
+        self.assertEqual(stats["replayed"], 1)
+
+    def test_compaction_never_rewrites_the_current_snapshot(self):
+        yard = Yard(self.config)
+        store = YardStore(self.path)
+        store.attach(yard)
+        yard.add_container(self.container("A", "2023-05-20"), (0, 0, 0))
+        self.assertEqual(store.compact(), 1)
+        current = os.path.join(self.path, store.latest()['directory'])
+        written = os.stat(os.path.join(current, 'ids.npy')).st_mtime_ns
+        self.assertEqual(store.compact(), 1)
+        self.assertEqual(os.stat(os.path.join(current, 'ids.npy')).st_mtime_ns, written)
+        # A snapshot interrupted before its rename leaves only a temporary directory behind
+        os.makedirs(os.path.join(self.path, 'snapshot-000000000002.tmp'))
+        store.close()
+        restored, stats = self.restore()
+        self.assertEqual((sorted(restored.containers), stats["snapshot_containers"]), (["A"], 1))
+
+    def test_torn_journal_line_is_skipped(self):
+        store = YardStore(self.path)
+        store.attach(Yard(self.config))
+        store.journal_file.write('{"seq": 1, "op": "ad')
+        store.close()
+        # Reopens the same journal file; the next entry has to start on a new line
+        yard = Yard(self.config)
+        store = YardStore(self.path)
+        self.assertEqual(store.attach(yard)["replayed"], 0)
+        yard.add_container(self.container("A", "2023-05-20"), (0, 0, 0))
+        store.close()
+        restored, stats = self.restore()
+        self.assertEqual((sorted(restored.containers), stats["replayed"]), (["A"], 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,8 +10,48 @@ class Config:
     API_KEY = os.getenv('API_KEY')
     DEBUG = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
     DATABASE_URL = os.getenv('DATABASE_URL')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() in ('true', '1', 't')
+    DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', 256))  # prepared statements kept per SQLite connection
+    SQLITE_WAL = os.getenv('SQLITE_WAL', 'True').lower() in ('true', '1', 't')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_DIR = os.getenv('LOG_DIR', 'logs')
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))  # rotate after this size
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))  # records buffered before new ones are dropped
+    LOG_TAIL_MAX_LINES = int(os.getenv('LOG_TAIL_MAX_LINES', 10000))
+    LOG_FOLLOW_TIMEOUT = float(os.getenv('LOG_FOLLOW_TIMEOUT', 300))  # longest /logs?follow=true stream, seconds
     MAX_CONTAINERS = int(os.getenv('MAX_CONTAINERS', 1000))
     OPTIMIZATION_INTERVAL = int(os.getenv('OPTIMIZATION_INTERVAL', 300))
+    PLACEMENT_STRATEGY = os.getenv('PLACEMENT_STRATEGY', 'dqn')
+    QUANTIZE_INFERENCE = os.getenv('QUANTIZE_INFERENCE', 'False').lower() in ('true', '1', 't')
+    INFERENCE_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', 2))
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', 64))
+    INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 5))  # seconds
+    REOPTIMIZE_MAX_MOVES = int(os.getenv('REOPTIMIZE_MAX_MOVES', 100))
+    REOPTIMIZE_TIME_BUDGET = float(os.getenv('REOPTIMIZE_TIME_BUDGET', 1.0))  # seconds
+    CSV_CHUNK_SIZE = int(os.getenv('CSV_CHUNK_SIZE', 500))
+    CONTAINER_CACHE_TTL = float(os.getenv('CONTAINER_CACHE_TTL', 5))  # seconds time-dependent fields may be stale
+    CONTAINER_CACHE_SIZE = int(os.getenv('CONTAINER_CACHE_SIZE', 128))  # cached pages
+    CONTAINER_PAGE_MAX = int(os.getenv('CONTAINER_PAGE_MAX', 1000))
+    ENABLE_BACKGROUND_LOOPS = os.getenv('ENABLE_BACKGROUND_LOOPS', 'False').lower() in ('true', '1', 't')
+    REPLAY_MEMORY_SIZE = int(os.getenv('REPLAY_MEMORY_SIZE', 2000))
+    PRIORITIZED_REPLAY = os.getenv('PRIORITIZED_REPLAY', 'False').lower() in ('true', '1', 't')
+    REPLAY_MEMORY_PATH = os.getenv('REPLAY_MEMORY_PATH') or None
+    TRAINING_PROCESS = os.getenv('TRAINING_PROCESS', 'True').lower() in ('true', '1', 't')
+    TRAINING_INTERVAL = float(os.getenv('TRAINING_INTERVAL', 60))  # seconds
+    TRAINING_BATCH_SIZE = int(os.getenv('TRAINING_BATCH_SIZE', 32))
+    TRAINING_STEPS = int(os.getenv('TRAINING_STEPS', 16))  # minibatch updates per round, published once
+    TRAINING_THREADS = int(os.getenv('TRAINING_THREADS', 1))
+    CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', os.path.join('backend', 'models', 'checkpoints'))
+    CHECKPOINT_POLL_INTERVAL = float(os.getenv('CHECKPOINT_POLL_INTERVAL', 5))  # seconds
+    YARD_STORE_PATH = os.getenv('YARD_STORE_PATH', os.path.join('backend', 'models', 'yard_state')) or None  # empty disables
+    YARD_COMPACT_EVERY = int(os.getenv('YARD_COMPACT_EVERY', 10000))  # journal entries between snapshots
+    YARD_JOURNAL_FSYNC = os.getenv('YARD_JOURNAL_FSYNC', 'False').lower() in ('true', '1', 't')
+    SIMULATOR_ENVS = int(os.getenv('SIMULATOR_ENVS', 16))  # simulated yards stepped per training round, 0 disables
+    SIMULATOR_STEPS = int(os.getenv('SIMULATOR_STEPS', 64))
 
 config = Config()
@@ -1,20 +1,109 @@
 import csv
+import io
+from itertools import islice
+from werkzeug.sansio.multipart import MultipartDecoder, NEED_DATA, File, Data, Epilogue
 from ..models.container import Container
 
-def parse_csv(file_path):
-    containers = []
-    with open(file_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            try:
-                container = Container(
-                    id=row['id'],
-                    weight=float(row['weight']),
-                    destination=row['destination'],
-                    arrival_date=row['arrival_date'],
-                    departure_date=row['departure_date']
-                )
-                containers.append(container)
-            except (ValueError, KeyError) as e:
-                print(f"Error parsing row: {row}. Error: {str(e)}")
-    return containers
+REQUIRED_FIELDS = ('id', 'weight', 'destination', 'arrival_date', 'departure_date')
+
+class CountingReader(io.RawIOBase):
+    # Wraps a binary stream and counts the bytes consumed, for upload progress
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        return size
+
+class MultipartFileReader(io.RawIOBase):
+    # Reads one file field of a multipart/form-data body straight from the request stream, so
+    # the upload is never spooled to memory or a temporary file. `open` skips ahead to the
+    # field and returns its filename, or None when the body has no such field.
+    def __init__(self, raw, boundary, field='file', chunk_size=64 * 1024):
+        self.raw = raw
+        self.decoder = MultipartDecoder(boundary.encode('latin-1'))
+        self.field = field
+        self.chunk_size = chunk_size
+        self.pending = b''
+        self.in_file = False
+
+    def readable(self):
+        return True
+
+    def _next_event(self):
+        event = self.decoder.next_event()
+        while event is NEED_DATA:
+            self.decoder.receive_data(self.raw.read(self.chunk_size) or None)
+            event = self.decoder.next_event()
+        return event
+
+    def open(self):
+        while True:
+            event = self._next_event()
+            if isinstance(event, File) and event.name == self.field:
+                self.in_file = True
+                return event.filename
+            if isinstance(event, Epilogue):
+                return None
+
+    def readinto(self, buffer):
+        while not self.pending and self.in_file:
+            event = self._next_event()
+            if isinstance(event, Data):
+                self.pending = event.data
+                self.in_file = event.more_data
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+def open_text_stream(stream):
+    return io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8', newline='')
+
+def parse_row(row):
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    weight = float(row['weight'])
+    if weight <= 0:
+        raise ValueError(f"invalid weight: {row['weight']}")
+    container = Container(
+        id=row['id'],
+        weight=weight,
+        destination=row['destination'],
+        arrival_date=row['arrival_date'],
+        departure_date=row['departure_date']
+    )
+    if container.arrival_date is None or container.departure_date is None:
+        raise ValueError("dates must be YYYY-MM-DD")
+    return container
+
+def parse_csv(source, errors=None):
+    # Yields containers one row at a time from a file path or an open text stream;
+    # invalid rows are skipped and, if `errors` is a list, recorded as (line, message)
+    if isinstance(source, str):
+        with open(source, 'r', newline='') as csvfile:
+            yield from parse_csv(csvfile, errors)
+        return
+    reader = csv.DictReader(source)
+    for row in reader:
+        try:
+            yield parse_row(row)
+        except (ValueError, KeyError, TypeError) as e:
+            if errors is not None:
+                errors.append((reader.line_num, str(e)))
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
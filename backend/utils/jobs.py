@@ -0,0 +1,71 @@
+import threading
+import time
+import uuid
+
+MAX_RECORDED_FAILURES = 1000
+
+class IngestJob:
+    def __init__(self, job_id, total_bytes=None):
+        self.id = job_id
+        self.status = 'running'
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.rows = 0
+        self.chunks = 0
+        self.placed = 0
+        self.failed = 0
+        self.failures = []
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def record_failure(self, failure):
+        self.failed += 1
+        if len(self.failures) < MAX_RECORDED_FAILURES:
+            self.failures.append(failure)
+
+    def finish(self, error=None):
+        self.status = 'failed' if error else 'completed'
+        self.error = error
+        self.finished_at = time.time()
+
+    def to_dict(self, include_failures=False):
+        progress = {
+            "job_id": self.id,
+            "status": self.status,
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "placed": self.placed,
+            "failed": self.failed,
+            "bytes_read": self.bytes_read,
+            "total_bytes": self.total_bytes,
+            "percent": round(100 * self.bytes_read / self.total_bytes, 1) if self.total_bytes else None,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "error": self.error
+        }
+        if include_failures:
+            progress["failures"] = self.failures
+        return progress
+
+class JobRegistry:
+    def __init__(self, max_finished=100):
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id=None, total_bytes=None):
+        # A client-chosen id must be new, or the earlier job's progress would become unreachable
+        job = IngestJob(job_id or uuid.uuid4().hex, total_bytes)
+        with self._lock:
+            if job.id in self._jobs:
+                raise ValueError(f"Job {job.id} already exists")
+            self._jobs[job.id] = job
+            finished = [j for j in self._jobs.values() if j.status != 'running']
+            for old in finished[:max(len(finished) - self.max_finished, 0)]:
+                del self._jobs[old.id]
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+ingest_jobs = JobRegistry()
@@ -0,0 +1,49 @@
+import os
+import time
+
+def tail(path, lines=100, block_size=8192):
+    # Last `lines` lines of a file, read backwards in blocks from the end, so the cost depends
+    # on the lines returned and not on the file size. Returns (lines, end offset).
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        data = b''
+        while position > 0 and data.count(b'\n') <= lines:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    found = data.splitlines(keepends=True)
+    if position > 0:
+        found = found[1:]  # the first line may have been cut by the block boundary
+    return [line.decode('utf-8', errors='replace') for line in found[-lines:]] if lines else [], end
+
+def follow(path, offset, timeout, poll_interval=0.5):
+    # Yields lines appended after `offset` until `timeout` seconds pass. A file that shrank or
+    # was replaced (rotation) is read again from its start.
+    deadline = time.monotonic() + timeout
+    f = open(path, 'rb')
+    inode = os.fstat(f.fileno()).st_ino
+    f.seek(offset)
+    partial = b''
+    try:
+        while time.monotonic() < deadline:
+            chunk = f.read()
+            if chunk:
+                *complete, partial = (partial + chunk).split(b'\n')
+                for line in complete:
+                    yield line.decode('utf-8', errors='replace') + '\n'
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and (stat.st_ino != inode or stat.st_size < f.tell()):
+                f.close()
+                f = open(path, 'rb')
+                inode = os.fstat(f.fileno()).st_ino
+                partial = b''
+                continue
+            time.sleep(poll_interval)
+    finally:
+        f.close()
@@ -1,32 +1,78 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+from .config import config
 
-def setup_logger(name, log_file, level=logging.INFO):
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Never blocks the logging thread: when the writer falls behind, records are dropped and counted
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The queue is in-process, so the record does not have to be made picklable here;
+        # formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+listeners = []
+
+def setup_logger(name, log_file, level=None):
+    # Callers only enqueue; a QueueListener thread formats and writes the records. The main
+    # process rotates the files; spawned workers (training) reopen them after a rotation instead
+    # of rotating themselves.
     formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
 
-    handler = logging.FileHandler(log_file)        
+    if multiprocessing.parent_process() is None:
+        handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=config.LOG_MAX_BYTES,
+                                                       backupCount=config.LOG_BACKUP_COUNT)
+    else:
+        handler = logging.handlers.WatchedFileHandler(log_file)
     handler.setFormatter(formatter)
+    listener = logging.handlers.QueueListener(queue.Queue(config.LOG_QUEUE_SIZE), handler)
+    listener.start()
+    listeners.append(listener)
 
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(handler)
+    logger.setLevel(level or getattr(logging, config.LOG_LEVEL, logging.INFO))
+    logger.addHandler(DroppingQueueHandler(listener.queue))
 
     return logger
 
+@atexit.register
+def stop_listeners():
+    # Flushes whatever is still queued
+    for listener in listeners:
+        listener.stop()
+    listeners.clear()
+
 
 def get_logger(name):
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     return logger
 
+def log_path(log_type):
+    return os.path.join(config.LOG_DIR, f'{log_type}.log')
+
+LOG_TYPES = ('app', 'training', 'optimization')
+
 training_logger = get_logger('training')
 optimization_logger = get_logger('optimization')
 app_logger = get_logger('app')
 
 # Create logs directory if it doesn't exist
-os.makedirs('logs', exist_ok=True)
+os.makedirs(config.LOG_DIR, exist_ok=True)
 
 # Set up loggers
-training_logger = setup_logger('training_logger', 'logs/training.log')
-optimization_logger = setup_logger('optimization_logger', 'logs/optimization.log')
-app_logger = setup_logger('app_logger', 'logs/app.log')
+training_logger = setup_logger('training_logger', log_path('training'))
+optimization_logger = setup_logger('optimization_logger', log_path('optimization'))
+app_logger = setup_logger('app_logger', log_path('app'))
@@ -0,0 +1,39 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class PageCache:
+    # Small LRU of serialized response bodies. Keys include the yard version, so entries for
+    # older versions are never hit again and simply age out.
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self.lock:
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def etag_for(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:20]
@@ -5,8 +5,8 @@ import sys
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
 
-from backend.app import app
+from backend.app import create_app
 from backend.utils.config import config
 
 if __name__ == '__main__':
-    app.run(debug=config.DEBUG)
+    create_app().run(debug=config.DEBUG)